@@ -0,0 +1,14 @@
+"""Benchmark suite for the real estate assistant.
+
+Run with `python -m benchmarks.run` from the repository root.
+"""
+import os
+import sys
+
+# The app modules live in src/ and import each other as top-level modules
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+# The OpenAI client refuses to construct without a key; benchmarks never hit the API
+os.environ.setdefault("DEEPSEEK_API_KEY", "benchmark-stub")
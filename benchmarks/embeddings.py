@@ -0,0 +1,85 @@
+"""Embedding backend benchmark: throughput, p99 query-encode latency, agreement with the reference.
+
+    python -m benchmarks.embeddings --onnx models/minilm.onnx --onnx models/minilm.int8.onnx
+    python -m benchmarks.embeddings --export models/minilm.onnx     # export fp32 + int8 first
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+import synthetic_data
+from embeddings import OnnxBackend, SentenceTransformerBackend, export_onnx
+from benchmarks import regression
+from benchmarks.regression import Recorder, percentile_ms
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def bench_backend(recorder, label, backend, docs, queries, reference=None):
+    """Record docs/s and query latency for one backend; returns its document vectors"""
+    print(f"\n🧮 {label}")
+    backend.encode(queries[:4])  # load the model and warm up outside the timed region
+
+    start = time.perf_counter()
+    vectors = backend.encode(docs)
+    recorder.add(f"embed.{label}.docs_per_sec", len(docs) / (time.perf_counter() - start), "docs/s", True)
+
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        backend.encode(query)
+        latencies.append(time.perf_counter() - start)
+    recorder.add(f"embed.{label}.query_p50_ms", percentile_ms(latencies, 50), "ms", False)
+    recorder.add(f"embed.{label}.query_p99_ms", percentile_ms(latencies, 99), "ms", False)
+
+    if reference is not None:
+        # Both backends return unit vectors, so the row-wise dot product is the cosine
+        cosine = np.einsum("ij,ij->i", vectors, reference)
+        recorder.add(f"embed.{label}.cosine_mean", cosine.mean(), "cosine", True)
+        recorder.add(f"embed.{label}.cosine_min", cosine.min(), "cosine", True)
+
+    return vectors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--onnx", action="append", default=[], help="ONNX model to compare (repeatable)")
+    parser.add_argument("--export", help="export fp32 and int8 ONNX models to this path before benchmarking")
+    parser.add_argument("--docs", type=int, default=2000, help="synthetic listings to encode")
+    parser.add_argument("--queries", type=int, default=300, help="single-query encodes to time")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--threads", type=int, default=None, help="intra-op threads for every backend")
+    parser.add_argument("--output", default=os.path.join(BENCH_DIR, "results", "embeddings.json"))
+    parser.add_argument("--baseline", default=os.path.join(BENCH_DIR, "baseline_embeddings.json"))
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    onnx_paths = list(args.onnx)
+    if args.export:
+        # Quantizing writes the int8 model next to the fp32 export
+        quantized = export_onnx(args.export, quantize=True)
+        onnx_paths += [args.export, quantized]
+
+    listings = list(synthetic_data.generate_listings(args.docs))
+    docs = [listing["document"] for listing in listings]
+    queries = [synthetic_data.listing_queries(listing)[0]["query"] for listing in listings[:args.queries]]
+
+    recorder = Recorder()
+    reference = bench_backend(recorder, "sentence-transformers",
+                              SentenceTransformerBackend(batch_size=args.batch_size, threads=args.threads),
+                              docs, queries)
+    for path in onnx_paths:
+        label = os.path.basename(path).replace(".onnx", "")
+        bench_backend(recorder, f"onnx-{label}",
+                      OnnxBackend(path, batch_size=args.batch_size, threads=args.threads),
+                      docs, queries, reference)
+
+    return regression.gate(recorder.metrics, args.output, args.baseline, args.tolerance, args.save_baseline)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
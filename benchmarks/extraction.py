@@ -0,0 +1,104 @@
+"""Financial entity extraction benchmark on a labelled message corpus.
+
+    python -m benchmarks.extraction
+
+Compares the regex extractor with the word-scan it replaced in
+CustomerAgent.coordinate_response: per-field accuracy, how often the
+extractor is confident (and right when it is), and per-message cost.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from entity_extraction import FINANCIAL_FIELDS, entity_values, extract_financial_entities, is_confident
+from benchmarks import regression
+from benchmarks.regression import Recorder
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CORPUS = os.path.join(BENCH_DIR, "data", "financial_messages.jsonl")
+
+
+def legacy_extract(user_message):
+    """The original word-scan, kept here as the comparison point"""
+    words = user_message.split()
+    price = 500000  # Default
+    income = 80000   # Default
+
+    for i, word in enumerate(words):
+        if '$' in word or 'price' in word.lower():
+            try:
+                price = int(''.join(filter(str.isdigit, word)))
+            except ValueError:
+                pass
+        if 'income' in word.lower() and i < len(words)-1:
+            try:
+                income = int(''.join(filter(str.isdigit, words[i+1])))
+            except ValueError:
+                pass
+    return {"price": price, "income": income}
+
+
+def field_correct(expected, got, field):
+    """A field is right when its value matches, or when it is correctly absent"""
+    if field not in expected:
+        return field not in got
+    return field in got and abs(got[field] - expected[field]) < 1e-6
+
+
+def time_per_message_us(extract, messages, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for message in messages:
+            extract(message)
+    return (time.perf_counter() - start) / (repeat * len(messages)) * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="JSON lines of {message, expected}")
+    parser.add_argument("--repeat", type=int, default=200, help="timing repetitions over the corpus")
+    parser.add_argument("--output", default=os.path.join(BENCH_DIR, "results", "extraction.json"))
+    parser.add_argument("--baseline", default=os.path.join(BENCH_DIR, "baseline_extraction.json"))
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    with open(args.corpus) as f:
+        corpus = [json.loads(line) for line in f if line.strip()]
+    messages = [item["message"] for item in corpus]
+
+    recorder = Recorder()
+    print(f"\n🔢 Extraction on {len(corpus)} labelled messages")
+
+    legacy = [legacy_extract(m) for m in messages]
+    extracted = [extract_financial_entities(m) for m in messages]
+    values = [entity_values(e) for e in extracted]
+
+    for field in ("price", "income"):
+        recorder.add(f"extraction.legacy.{field}_accuracy",
+                     sum(field_correct(item["expected"], got, field) for item, got in zip(corpus, legacy)) / len(corpus),
+                     "ratio", True)
+    for field in FINANCIAL_FIELDS:
+        recorder.add(f"extraction.regex.{field}_accuracy",
+                     sum(field_correct(item["expected"], got, field) for item, got in zip(corpus, values)) / len(corpus),
+                     "ratio", True)
+
+    exact = [all(field_correct(item["expected"], got, f) for f in FINANCIAL_FIELDS) for item, got in zip(corpus, values)]
+    confident = [is_confident(e, m) for e, m in zip(extracted, messages)]
+    recorder.add("extraction.regex.message_exact_match", sum(exact) / len(corpus), "ratio", True)
+    recorder.add("extraction.regex.confident_rate", sum(confident) / len(corpus), "ratio", True)
+    if any(confident):
+        recorder.add("extraction.regex.confident_precision",
+                     sum(c and e for c, e in zip(confident, exact)) / sum(confident), "ratio", True)
+
+    recorder.add("extraction.legacy.us_per_message", time_per_message_us(legacy_extract, messages, args.repeat), "us", False)
+    recorder.add("extraction.regex.us_per_message",
+                 time_per_message_us(extract_financial_entities, messages, args.repeat), "us", False)
+
+    return regression.gate(recorder.metrics, args.output, args.baseline, args.tolerance, args.save_baseline)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""Benchmark result recording and comparison against a stored baseline"""
+import json
+import os
+import platform
+import time
+
+import numpy as np
+
+# Allowed absolute change for metrics whose baseline is 0 (e.g. a ratio that must stay at 0)
+ZERO_BASELINE_TOLERANCE = 0.01
+
+
+def percentile_ms(samples, q):
+    return float(np.percentile(samples, q) * 1000)
+
+
+class Recorder:
+    """Collects named metrics in the machine-readable results format"""
+
+    def __init__(self):
+        self.metrics = {}
+
+    def add(self, name, value, unit, higher_is_better):
+        self.metrics[name] = {"value": round(float(value), 4), "unit": unit,
+                              "higher_is_better": higher_is_better}
+        print(f"  {name}: {value:,.3f} {unit}")
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_results(results, path):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+
+def compare(current, baseline, tolerance=0.15, zero_tolerance=ZERO_BASELINE_TOLERANCE):
+    """Return a list of regressions: metrics worse than baseline by more than `tolerance` (relative).
+
+    A relative change from 0 is undefined, so metrics whose baseline is 0 (stale
+    hits, fallback share) are gated on an absolute change of `zero_tolerance`.
+    """
+    regressions = []
+    baseline_metrics = baseline.get("metrics", {})
+
+    for name, metric in current.get("metrics", {}).items():
+        reference = baseline_metrics.get(name)
+        if reference is None:
+            continue
+
+        if reference["value"]:
+            change = (metric["value"] - reference["value"]) / abs(reference["value"])
+            limit = tolerance
+        else:
+            change = metric["value"]
+            limit = zero_tolerance
+        worse = -change if metric["higher_is_better"] else change
+        if worse > limit:
+            regressions.append({
+                "metric": name,
+                "baseline": reference["value"],
+                "current": metric["value"],
+                "unit": metric["unit"],
+                "change_percent": round(change * 100, 1) if reference["value"] else None
+            })
+
+    return regressions
+
+
+def gate(metrics, output, baseline, tolerance=0.15, save_baseline=False):
+    """Write results, optionally store them as the baseline, and return an exit code"""
+    results = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "metrics": metrics
+    }
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    save_results(results, output)
+    print(f"\n📝 Results written to {output}")
+
+    if save_baseline:
+        save_results(results, baseline)
+        print(f"📌 Baseline saved to {baseline}")
+        return 0
+
+    if not os.path.exists(baseline):
+        print("ℹ️  No baseline found; run with --save-baseline to create one")
+        return 0
+
+    regressions = compare(results, load_results(baseline), tolerance)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) beyond {tolerance:.0%}:")
+        for r in regressions:
+            change = f"{r['change_percent']:+}%" if r["change_percent"] is not None else "from zero"
+            print(f"  {r['metric']}: {r['baseline']} -> {r['current']} {r['unit']} ({change})")
+        return 1
+
+    print("\n✅ No regressions against baseline")
+    return 0
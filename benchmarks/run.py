@@ -0,0 +1,370 @@
+"""Retrieval and agent benchmarks with regression gates.
+
+    python -m benchmarks.run                      # run everything, compare to baseline
+    python -m benchmarks.run --sizes 1000         # smaller corpus only
+    python -m benchmarks.run --save-baseline      # record this run as the new baseline
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+import synthetic_data
+from llm_client import estimate_tokens
+from benchmarks import regression
+from benchmarks.regression import Recorder, percentile_ms
+from benchmarks.stub_llm import StubLLM
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+DEFAULT_OUTPUT = os.path.join(BENCH_DIR, "results", "latest.json")
+
+
+def bench_retrieval(recorder, sizes, n_queries, k, batch_size, backends=("chroma",)):
+    """Ingest throughput plus semantic_search latency and recall@k per corpus size and vector backend"""
+    import advanced_rag
+
+    original_backend = advanced_rag.VECTOR_BACKEND
+    advanced_rag.MMAP_INDEX_PATH = os.path.join(BENCH_DIR, "results", "index", "real_estate")
+    profiles = synthetic_data.zip_profiles()
+    for size in sizes:
+        docs = [listing["document"] for listing in synthetic_data.generate_listings(size)]
+
+        for backend in backends:
+            print(f"\n📚 Retrieval @ {size:,} listings ({backend})")
+            advanced_rag.VECTOR_BACKEND = backend
+            advanced_rag.reset_vector_database()
+            start = time.perf_counter()
+            advanced_rag.setup_vector_database(docs, batch_size=batch_size)
+            elapsed = time.perf_counter() - start
+            recorder.add(f"ingest.{backend}.{size}.docs_per_sec", size / elapsed, "docs/s", True)
+
+            # Listings are random-access by index, so only the labelled targets are rebuilt
+            rng = np.random.default_rng(7)
+            targets = rng.choice(size, size=min(n_queries, size), replace=False)
+            latencies = []
+            hits = 0
+            total = 0
+            for target in targets.tolist():
+                listing = synthetic_data.make_listing(target, profiles)
+                for labelled in synthetic_data.listing_queries(listing):
+                    start = time.perf_counter()
+                    results = advanced_rag.semantic_search(labelled["query"], n_results=k)
+                    latencies.append(time.perf_counter() - start)
+                    hits += listing["document"] in results
+                    total += 1
+
+            recorder.add(f"search.{backend}.{size}.p50_ms", percentile_ms(latencies, 50), "ms", False)
+            recorder.add(f"search.{backend}.{size}.p95_ms", percentile_ms(latencies, 95), "ms", False)
+            recorder.add(f"search.{backend}.{size}.recall_at_{k}", hits / total, "ratio", True)
+
+    advanced_rag.VECTOR_BACKEND = original_backend
+
+
+def bench_rerank(recorder, size, n_queries, batch_size):
+    """Precision@2 gain and added latency of the cross-encoder re-rank stage"""
+    import advanced_rag
+
+    print(f"\n🎯 Re-rank @ {size:,} listings")
+    advanced_rag.reset_vector_database()
+    advanced_rag.setup_vector_database(
+        (listing["document"] for listing in synthetic_data.generate_listings(size)), batch_size=batch_size)
+
+    profiles = synthetic_data.zip_profiles()
+    rng = np.random.default_rng(13)
+    targets = rng.choice(size, size=min(n_queries, size), replace=False)
+    hits = {False: 0, True: 0}
+    latencies = {False: [], True: []}
+    for target in targets.tolist():
+        listing = synthetic_data.make_listing(target, profiles)
+        for labelled in synthetic_data.listing_queries(listing):
+            for rerank in (False, True):
+                start = time.perf_counter()
+                docs = advanced_rag.retrieve_context(labelled["query"], n_results=2, rerank=rerank)
+                latencies[rerank].append(time.perf_counter() - start)
+                hits[rerank] += listing["document"] in docs
+
+    total = len(latencies[False])
+    recorder.add("rerank.dense.precision_at_2", hits[False] / total, "ratio", True)
+    recorder.add("rerank.reranked.precision_at_2", hits[True] / total, "ratio", True)
+    recorder.add("rerank.precision_gain", (hits[True] - hits[False]) / total, "ratio", True)
+    recorder.add("rerank.added_p95_ms",
+                 percentile_ms(latencies[True], 95) - percentile_ms(latencies[False], 95), "ms", False)
+
+
+def bench_parallel_ingest(recorder, size, worker_counts, batch_size):
+    """Ingest throughput scaling across process-pool sizes (1 = in-process path)"""
+    import advanced_rag
+
+    print(f"\n⚙️  Parallel ingest @ {size:,} listings")
+    docs = [listing["document"] for listing in synthetic_data.generate_listings(size)]
+
+    single = None
+    for workers in worker_counts:
+        advanced_rag.reset_vector_database()
+        start = time.perf_counter()
+        advanced_rag.setup_vector_database(docs, batch_size=batch_size, workers=workers)
+        docs_per_sec = size / (time.perf_counter() - start)
+        recorder.add(f"ingest_parallel.{size}.workers_{workers}.docs_per_sec", docs_per_sec, "docs/s", True)
+
+        if workers == 1:
+            single = docs_per_sec
+        elif single:
+            recorder.add(f"ingest_parallel.{size}.workers_{workers}.scaling_efficiency",
+                         docs_per_sec / (single * workers), "ratio", True)
+
+
+def bench_updates(recorder, size, n_events, batch_size):
+    """Change-feed apply throughput, update visibility latency and stale hits after deletes"""
+    import advanced_rag
+    from change_feed import ChangeFeedConsumer
+
+    print(f"\n🔄 Incremental updates @ {size:,} listings, {n_events:,} change events")
+    advanced_rag.reset_vector_database()
+    listings = list(synthetic_data.generate_listings(size))
+    advanced_rag.upsert_listings(listings, batch_size=batch_size)
+    events = list(synthetic_data.listing_change_events(listings, n_events))
+
+    consumer = ChangeFeedConsumer(batch_size=batch_size)
+    start = time.perf_counter()
+    consumer.consume(events[:-1])
+    recorder.add("updates.events_per_sec", (len(events) - 1) / (time.perf_counter() - start), "events/s", True)
+
+    # Time from a single event arriving to a query returning the new version
+    last = next(e for e in reversed(events) if e["op"] == "upsert")["listing"]
+    last = dict(last, version=last["version"] + 1, document=last["document"] + " Price reduced.")
+    start = time.perf_counter()
+    consumer.submit({"op": "upsert", "listing": last})
+    consumer.flush()
+    visible = last["document"] in advanced_rag.semantic_search(last["document"], n_results=1)
+    recorder.add("updates.visibility_ms", (time.perf_counter() - start) * 1000, "ms", False)
+    recorder.add("updates.visible_after_flush", float(visible), "ratio", True)
+
+    deleted = {e["listing_id"] for e in events if e["op"] == "delete"}
+    by_id = {listing["listing_id"]: listing for listing in listings}
+    sample = sorted(deleted)[:50]
+    stale = sum(by_id[listing_id]["document"] in advanced_rag.semantic_search(by_id[listing_id]["document"], n_results=1)
+                for listing_id in sample)
+    recorder.add("updates.stale_hits_after_delete", stale / max(len(sample), 1), "ratio", False)
+
+
+def bench_comps(recorder, n_listings, n_queries):
+    """Comps engine query latency over a metro-sized sales history"""
+    from comps import CompsEngine
+
+    print(f"\n🏘️  Comps @ {n_listings:,} listings")
+    start = time.perf_counter()
+    engine = CompsEngine.from_records(synthetic_data.generate_listings(n_listings, seed=99))
+    recorder.add("comps.build_seconds", time.perf_counter() - start, "s", False)
+
+    profiles = synthetic_data.zip_profiles()
+    latencies = []
+    for i in range(n_queries):
+        subject = synthetic_data.make_listing(i, profiles, seed=100)
+        start = time.perf_counter()
+        engine.find_comps(subject["beds"], subject["baths"], subject["sqft"], subject["year_built"],
+                          lat=subject["lat"], lon=subject["lon"])
+        latencies.append(time.perf_counter() - start)
+
+    recorder.add("comps.query_p50_ms", percentile_ms(latencies, 50), "ms", False)
+    recorder.add("comps.query_p95_ms", percentile_ms(latencies, 95), "ms", False)
+
+
+def bench_portfolio(recorder, n_paths, n_properties):
+    """Monte Carlo portfolio simulator wall time"""
+    from portfolio_simulator import simulate_portfolio
+
+    print(f"\n📈 Portfolio simulation @ {n_paths:,} paths x {n_properties} properties")
+    rng = np.random.default_rng(17)
+    prices = rng.uniform(200_000, 900_000, n_properties)
+    properties = [{"price": float(p), "monthly_rent": float(p * rng.uniform(0.005, 0.008))} for p in prices]
+
+    start = time.perf_counter()
+    simulate_portfolio(properties, n_paths=n_paths, seed=1)
+    elapsed = time.perf_counter() - start
+    recorder.add("portfolio.seconds", elapsed, "s", False)
+    recorder.add("portfolio.path_properties_per_sec", n_paths * n_properties / elapsed, "path-properties/s", True)
+
+
+def bench_financial(recorder, n_loans):
+    """Scalar calculate_mortgage loop vs the vectorized batch version"""
+    from real_estate_agent import calculate_mortgage, calculate_mortgage_batch
+
+    print(f"\n💰 Financial tools @ {n_loans:,} loans")
+    rng = np.random.default_rng(11)
+    prices = rng.uniform(150_000, 1_500_000, n_loans)
+    downs = rng.choice([3.5, 5, 10, 20, 25], n_loans)
+    rates = rng.uniform(3.0, 8.5, n_loans)
+    years = rng.choice([15, 30], n_loans)
+
+    start = time.perf_counter()
+    for args in zip(prices.tolist(), downs.tolist(), rates.tolist(), years.tolist()):
+        calculate_mortgage(*args)
+    scalar = n_loans / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    calculate_mortgage_batch(prices, downs, rates, years)
+    batch = n_loans / (time.perf_counter() - start)
+
+    recorder.add("financial.scalar.loans_per_sec", scalar, "loans/s", True)
+    recorder.add("financial.batch.loans_per_sec", batch, "loans/s", True)
+
+
+def bench_llm_client(recorder, n_requests, latency_ms, concurrency=16):
+    """Coalescing and wrapper overhead of RateLimitedClient under concurrent identical requests"""
+    from concurrent.futures import ThreadPoolExecutor
+    from llm_client import RateLimitedClient
+
+    latency_ms = max(latency_ms, 20.0)
+    print(f"\n🚦 LLM client @ {n_requests} requests, {concurrency} threads (stub latency {latency_ms} ms)")
+    stub = StubLLM(latency_ms=latency_ms)
+    # Limits off: this measures coalescing and wrapper cost, not the provider's quota
+    wrapped = RateLimitedClient(stub, requests_per_minute=0, tokens_per_minute=0)
+    questions = [f"What is the market like in {zip_code}?" for zip_code in list(synthetic_data.AUSTIN_ZIPS)[:4]]
+
+    def ask(i):
+        start = time.perf_counter()
+        wrapped.chat.completions.create(
+            model="deepseek-chat",
+            messages=[{"role": "user", "content": questions[i % len(questions)]}],
+            max_tokens=100
+        )
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(ask, range(n_requests)))
+
+    recorder.add("llm.upstream_calls_per_request", wrapped.stats["upstream_calls"] / n_requests, "calls", False)
+    recorder.add("llm.coalesced_share", wrapped.stats["coalesced"] / n_requests, "ratio", True)
+    recorder.add("llm.call.p50_ms", percentile_ms(latencies, 50), "ms", False)
+
+
+# Completion ceilings of the sub-agent calls before handoffs replaced their prose answers
+LEGACY_AGENT_MAX_TOKENS = {"research": 400, "financial": 400, "search": 300}
+
+
+def legacy_synthesis_tokens(question, needs):
+    """Synthesis prompt size under the old design, where every sub-agent passed a prose answer"""
+    agent_responses = {need: StubLLM.answer(LEGACY_AGENT_MAX_TOKENS[need]) for need in needs}
+    synthesis_prompt = f"""
+        User asked: "{question}"
+        
+        Agent responses:
+        {json.dumps(agent_responses, indent=2)}
+        
+        Provide a comprehensive, helpful response that synthesizes insights from all agents.
+        Be conversational and focus on what's most important for the user.
+        """
+    system = "You are a helpful real estate assistant providing comprehensive guidance."
+    return estimate_tokens(system + "\n" + synthesis_prompt)
+
+
+def bench_end_to_end(recorder, n_turns, latency_ms):
+    """coordinate_response latency with every LLM call answered by the local stub"""
+    import advanced_rag
+
+    # Start from an empty collection; CustomerAgent() indexes the default corpus
+    advanced_rag.reset_vector_database()
+    import multi_agent_system
+
+    print(f"\n🤖 coordinate_response @ {n_turns} turns (stub latency {latency_ms} ms)")
+    stub = StubLLM(latency_ms=latency_ms)
+    advanced_rag.client = stub
+    multi_agent_system.client = stub
+
+    import metrics
+    metrics.reset()
+    agent = multi_agent_system.CustomerAgent()
+    questions = [
+        "Can I afford a $450,000 home with $90,000 income?",
+        "What's the Austin real estate market like for investors?",
+        "Which property has a swimming pool?",
+        "Compare neighborhoods in 78704 and 78701 for a family",
+    ]
+
+    latencies = []
+    synthesis_tokens = []
+    legacy_tokens = []
+    for i in range(n_turns):
+        question = questions[i % len(questions)]
+        start = time.perf_counter()
+        agent.coordinate_response(question)
+        latencies.append(time.perf_counter() - start)
+        # Synthesis is the last LLM call of a turn
+        synthesis_tokens.append(stub.calls[-1]["prompt_tokens"])
+        routed = [e for e in metrics.recent_events if e["event"] == "routing_decision"][-1]
+        legacy_tokens.append(legacy_synthesis_tokens(question, routed["needs"]))
+
+    recorder.add("e2e.coordinate_response.p50_ms", percentile_ms(latencies, 50), "ms", False)
+    recorder.add("e2e.coordinate_response.p95_ms", percentile_ms(latencies, 95), "ms", False)
+    recorder.add("e2e.llm_calls_per_turn", len(stub.calls) / n_turns, "calls", False)
+    recorder.add("e2e.prompt_tokens_per_turn", sum(c["prompt_tokens"] for c in stub.calls) / n_turns, "tokens", False)
+    recorder.add("e2e.synthesis.prompt_tokens", float(np.mean(synthesis_tokens)), "tokens", False)
+    recorder.add("e2e.synthesis.legacy_prompt_tokens", float(np.mean(legacy_tokens)), "tokens", False)
+    recorder.add("e2e.synthesis.prompt_token_reduction",
+                 1 - sum(synthesis_tokens) / sum(legacy_tokens), "ratio", True)
+    counts = metrics.snapshot()
+    recorder.add("e2e.routing.fallback_share",
+                 counts.get("routing_decision.source.keyword_fallback", 0) / n_turns, "ratio", False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,100000,1000000",
+                        help="comma-separated corpus sizes for the retrieval benchmark")
+    parser.add_argument("--backends", default="chroma,mmap", help="vector backends for the retrieval benchmark")
+    parser.add_argument("--queries", type=int, default=200, help="labelled listings queried per corpus size")
+    parser.add_argument("--k", type=int, default=3, help="n_results for semantic_search / recall@k")
+    parser.add_argument("--batch-size", type=int, default=64, help="ingestion batch size")
+    parser.add_argument("--rerank-size", type=int, default=10000, help="corpus size for the re-rank benchmark")
+    parser.add_argument("--workers", default="1,2,4", help="process-pool sizes for the parallel ingest benchmark")
+    parser.add_argument("--parallel-size", type=int, default=20000, help="corpus size for the parallel ingest benchmark")
+    parser.add_argument("--update-listings", type=int, default=20000, help="listings loaded for the update benchmark")
+    parser.add_argument("--update-events", type=int, default=5000, help="change events for the update benchmark")
+    parser.add_argument("--comps-listings", type=int, default=500_000, help="sales history size for the comps benchmark")
+    parser.add_argument("--portfolio", default="20000x50", help="paths x properties for the portfolio benchmark")
+    parser.add_argument("--loans", type=int, default=100_000, help="loans for the financial benchmark")
+    parser.add_argument("--llm-requests", type=int, default=400, help="concurrent requests for the LLM client benchmark")
+    parser.add_argument("--turns", type=int, default=20, help="coordinate_response turns")
+    parser.add_argument("--stub-latency-ms", type=float, default=0.0, help="simulated latency per LLM call")
+    parser.add_argument("--skip", default="", help="comma-separated sections to skip: retrieval,rerank,parallel,updates,comps,portfolio,financial,llm,e2e")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="where to write this run's results")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative regression")
+    parser.add_argument("--save-baseline", action="store_true", help="write this run to --baseline")
+    args = parser.parse_args(argv)
+
+    skip = set(filter(None, args.skip.split(",")))
+    recorder = Recorder()
+
+    if "retrieval" not in skip:
+        sizes = [int(s) for s in args.sizes.split(",") if s]
+        backends = [b for b in args.backends.split(",") if b]
+        bench_retrieval(recorder, sizes, args.queries, args.k, args.batch_size, backends)
+    if "rerank" not in skip:
+        bench_rerank(recorder, args.rerank_size, args.queries, args.batch_size)
+    if "parallel" not in skip:
+        worker_counts = [int(w) for w in args.workers.split(",") if w]
+        bench_parallel_ingest(recorder, args.parallel_size, worker_counts, args.batch_size)
+    if "updates" not in skip:
+        bench_updates(recorder, args.update_listings, args.update_events, args.batch_size)
+    if "comps" not in skip:
+        bench_comps(recorder, args.comps_listings, args.queries)
+    if "portfolio" not in skip:
+        n_paths, n_properties = (int(x) for x in args.portfolio.split("x"))
+        bench_portfolio(recorder, n_paths, n_properties)
+    if "financial" not in skip:
+        bench_financial(recorder, args.loans)
+    if "llm" not in skip:
+        bench_llm_client(recorder, args.llm_requests, args.stub_latency_ms)
+    if "e2e" not in skip:
+        bench_end_to_end(recorder, args.turns, args.stub_latency_ms)
+
+    return regression.gate(recorder.metrics, args.output, args.baseline, args.tolerance, args.save_baseline)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+"""Local stand-in for the DeepSeek client so agent turns can be timed offline"""
+import json
+import time
+from types import SimpleNamespace
+
+from llm_client import estimate_tokens
+
+
+class _Completions:
+    def __init__(self, stub):
+        self._stub = stub
+
+    def create(self, model=None, messages=None, max_tokens=None, **kwargs):
+        return self._stub.respond(messages or [], max_tokens or 0, kwargs)
+
+
+class StubLLM:
+    """Mimics `client.chat.completions.create` with canned answers and a fixed latency"""
+
+    def __init__(self, latency_ms=0.0, needs=("research", "financial", "search")):
+        self.latency_ms = latency_ms
+        self.needs = list(needs)
+        self.calls = []
+        self.chat = SimpleNamespace(completions=_Completions(self))
+
+    def respond(self, messages, max_tokens, kwargs):
+        prompt = "\n".join(str(m.get("content", "")) if isinstance(m, dict) else str(m.content)
+                           for m in messages)
+        prompt_tokens = estimate_tokens(prompt)
+        self.calls.append({"prompt_tokens": prompt_tokens, "max_tokens": max_tokens})
+
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+        tool_calls = None
+        tool_choice = kwargs.get("tool_choice")
+        forced = tool_choice["function"]["name"] if isinstance(tool_choice, dict) else None
+        if forced == "route_request":
+            arguments = json.dumps({"needs": self.needs, "priority": self.needs[0]})
+            tool_calls = [SimpleNamespace(id="call_0", type="function",
+                                          function=SimpleNamespace(name="route_request", arguments=arguments))]
+            content = None
+        elif "Respond with JSON" in prompt:
+            content = json.dumps({"needs": self.needs, "priority": self.needs[0]})
+        else:
+            content = self.answer(max_tokens)
+
+        message = SimpleNamespace(role="assistant", content=content, tool_calls=tool_calls)
+        usage = SimpleNamespace(prompt_tokens=prompt_tokens,
+                                completion_tokens=estimate_tokens(content or ""),
+                                total_tokens=prompt_tokens + estimate_tokens(content or ""))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason="stop")],
+                               usage=usage)
+
+    @staticmethod
+    def answer(max_tokens):
+        """Canned prose reply, sized from the completion ceiling"""
+        return "Stub answer. " * max(1, min(max_tokens, 400) // 4)
+
+    def reset(self):
+        self.calls = []
@@ -1,23 +1,47 @@
 import chromadb
-from sentence_transformers import SentenceTransformer
-from openai import OpenAI
+from llm_client import get_client
 from dotenv import load_dotenv
 import os
+import hashlib
+import threading
+from itertools import islice
+from embeddings import get_embedding_backend
+from mmap_store import MmapStoreWriter, MmapVectorStore
+from reranker import get_reranker
+from profiling import profiled
+from metrics import record_event
 
 load_dotenv()
 
 # Initialize components
-client = OpenAI(
-    api_key=os.getenv("DEEPSEEK_API_KEY"),
-    base_url="https://api.deepseek.com/v1"
-)
+client = get_client()
 
-# Initialize embedding model (runs locally, no API cost)
-embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+# Initialize embedding model (runs locally, no API cost; loaded on first encode)
+# EMBEDDING_BACKEND=onnx switches to ONNX Runtime, see embeddings.py
+embedding_model = get_embedding_backend()
 
 # Initialize ChromaDB
 chroma_client = chromadb.Client()
 collection = chroma_client.create_collection(name="real_estate")
+# Version of every deleted listing, so a late or replayed upsert can't bring it back
+tombstones = chroma_client.create_collection(name="real_estate_tombstones")
+
+# VECTOR_BACKEND=mmap keeps embeddings in a memory-mapped matrix at MMAP_INDEX_PATH
+# instead of ChromaDB (exact search, shared across processes, no load step)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")
+MMAP_INDEX_PATH = os.getenv("MMAP_INDEX_PATH", "data/index/real_estate")
+MMAP_DTYPE = os.getenv("MMAP_DTYPE", "float32")
+mmap_writer = None
+mmap_store = None
+
+# RAG_RERANK=1 over-fetches candidates and re-ranks them with a cross-encoder (see reranker.py)
+RAG_RERANK = os.getenv("RAG_RERANK", "0") == "1"
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "12"))
+reranker = None
+
+# Set once the default corpus is indexed in this process (see ensure_vector_database)
+_database_ready = False
+_setup_lock = threading.Lock()
 
 # More detailed real estate documents
 detailed_docs = [
@@ -34,35 +58,251 @@ detailed_docs = [
     "Neighborhood Guide: Austin TX 78704 (South Austin) - Family-friendly area with tree-lined streets. Average home price $465,000. Known for local businesses, food trucks, and community parks. Highly rated schools and safe neighborhoods. 15-minute drive to downtown."
 ]
 
-def setup_vector_database():
-    """Add documents to ChromaDB with embeddings"""
-    for i, doc in enumerate(detailed_docs):
-        # Create embedding
-        embedding = embedding_model.encode(doc).tolist()
+def _content_id(doc):
+    """Stable id for a bulk-loaded document, so re-running ingestion overwrites instead of colliding"""
+    return f"doc_{hashlib.sha1(doc.encode('utf-8')).hexdigest()[:16]}"
+
+def _add_batch(batch, embeddings, offset):
+    """Commit one batch of documents and their embeddings to the vector store"""
+    global mmap_writer
+    
+    if VECTOR_BACKEND == "mmap":
+        # The mmap index is written from scratch each time, so row positions are unique
+        if mmap_writer is None:
+            mmap_writer = MmapStoreWriter(MMAP_INDEX_PATH, embeddings.shape[1], MMAP_DTYPE)
+        mmap_writer.add([f"doc_{offset + j}" for j in range(len(batch))], batch, embeddings)
+        return
+    
+    # Repeated documents within a batch would be duplicate ids in one upsert
+    unique = {}
+    for doc, embedding in zip(batch, embeddings):
+        unique.setdefault(_content_id(doc), (doc, embedding))
+    
+    collection.upsert(
+        documents=[doc for doc, _ in unique.values()],
+        embeddings=[embedding.tolist() for _, embedding in unique.values()],
+        ids=list(unique)
+    )
+
+def _finish_ingest():
+    """Publish the mmap index once all batches are written"""
+    global mmap_writer, mmap_store
+    if mmap_writer is not None:
+        mmap_store = mmap_writer.close()
+        mmap_writer = None
+
+@profiled()
+def setup_vector_database(docs=None, batch_size=64, workers=None, shard_size=2048):
+    """Add documents to ChromaDB with embeddings
+    
+    With workers > 1 the documents are embedded by a process pool and committed
+    here by a single writer (see parallel_ingest.py).
+    """
+    if docs is None:
+        docs = detailed_docs
+    
+    if workers and workers > 1:
+        from parallel_ingest import parallel_ingest, print_ingest_stats
+        stats = parallel_ingest(docs, _add_batch, workers=workers, shard_size=shard_size, batch_size=batch_size)
+        _finish_ingest()
+        print_ingest_stats(stats)
+        return stats
+    
+    docs = iter(docs)
+    count = 0
+    while True:
+        batch = list(islice(docs, batch_size))
+        if not batch:
+            break
+        
+        # Create embeddings for the whole batch in one forward pass
+        embeddings = embedding_model.encode(batch, batch_size=batch_size)
         
         # Add to ChromaDB
-        collection.add(
-            documents=[doc],
-            embeddings=[embedding],
-            ids=[f"doc_{i}"]
+        _add_batch(batch, embeddings, count)
+        count += len(batch)
+    _finish_ingest()
+    print(f"✅ Added {count} documents to vector database")
+
+def ensure_vector_database():
+    """Index the default corpus once per process; later calls return immediately
+    
+    Agents call this when constructed instead of indexing at import time. With
+    VECTOR_BACKEND=mmap an index already built at MMAP_INDEX_PATH is used as is.
+    """
+    global _database_ready
+    if _database_ready:
+        return
+    with _setup_lock:
+        if _database_ready:
+            return
+        if not (VECTOR_BACKEND == "mmap" and os.path.exists(f"{MMAP_INDEX_PATH}.meta.json")):
+            setup_vector_database()
+        _database_ready = True
+
+def reset_vector_database():
+    """Drop and recreate the collection (used by benchmarks between corpus sizes)"""
+    global collection, tombstones, mmap_store, _database_ready
+    mmap_store = None
+    _database_ready = False
+    for name in ("real_estate", "real_estate_tombstones"):
+        try:
+            chroma_client.delete_collection(name=name)
+        except ValueError:
+            pass
+    collection = chroma_client.create_collection(name="real_estate")
+    tombstones = chroma_client.create_collection(name="real_estate_tombstones")
+    return collection
+
+def listing_doc_id(listing_id):
+    return f"listing_{listing_id}"
+
+def _listing_metadata(listing):
+    """Chroma metadata for a listing (Chroma only stores scalar, non-null values)"""
+    metadata = {"listing_id": str(listing["listing_id"]), "version": int(listing.get("version", 1))}
+    for field in ("zip", "status", "list_price", "beds", "baths", "sqft"):
+        value = listing.get(field)
+        if isinstance(value, (str, int, float, bool)):
+            metadata[field] = value
+    return metadata
+
+def _stored_versions(doc_ids, source=None):
+    """Version currently indexed (or, with source=tombstones, deleted) for each id that exists"""
+    existing = (source or collection).get(ids=doc_ids, include=["metadatas"])
+    return {doc_id: (metadata or {}).get("version", 0)
+            for doc_id, metadata in zip(existing["ids"], existing["metadatas"])}
+
+def _latest_versions(doc_ids):
+    """Newest version seen per id, live or deleted; a missing id is version 0"""
+    live = _stored_versions(doc_ids)
+    deleted = _stored_versions(doc_ids, source=tombstones)
+    return {doc_id: max(live.get(doc_id, 0), deleted.get(doc_id, 0)) for doc_id in doc_ids}
+
+def _require_mutable_backend():
+    if VECTOR_BACKEND == "mmap":
+        raise RuntimeError("The mmap index is read-only; rebuild it offline with setup_vector_database")
+
+def upsert_listings(listings, batch_size=64):
+    """Insert or replace listings keyed by their stable listing_id
+    
+    Each listing needs `listing_id` and `document`; `version` (default 1) must be
+    newer than the indexed one, or than the delete that removed it, or the
+    listing is skipped, so replayed or out-of-order feed events never overwrite
+    fresher data or resurrect a deleted listing. Changes are visible
+    to the next query; readers are never blocked by a rebuild.
+    """
+    _require_mutable_backend()
+    
+    # Highest version per listing within this call
+    latest = {}
+    for listing in listings:
+        current = latest.get(listing["listing_id"])
+        if current is None or listing.get("version", 1) >= current.get("version", 1):
+            latest[listing["listing_id"]] = listing
+    if not latest:
+        return {"upserted": 0, "skipped_stale": 0}
+    
+    stored = _latest_versions([listing_doc_id(listing_id) for listing_id in latest])
+    fresh = [listing for listing_id, listing in latest.items()
+             if listing.get("version", 1) > stored[listing_doc_id(listing_id)]]
+    
+    for start in range(0, len(fresh), batch_size):
+        batch = fresh[start:start + batch_size]
+        docs = [listing["document"] for listing in batch]
+        embeddings = embedding_model.encode(docs, batch_size=batch_size)
+        collection.upsert(
+            ids=[listing_doc_id(listing["listing_id"]) for listing in batch],
+            documents=docs,
+            embeddings=embeddings.tolist(),
+            metadatas=[_listing_metadata(listing) for listing in batch]
         )
-    print(f"✅ Added {len(detailed_docs)} documents to vector database")
+    
+    return {"upserted": len(fresh), "skipped_stale": len(latest) - len(fresh)}
 
-def semantic_search(query, n_results=3):
-    """Search using semantic similarity"""
-    query_embedding = embedding_model.encode(query).tolist()
+def delete_listings(listing_ids, versions=None):
+    """Remove listings (e.g. gone off-market) by listing_id
+    
+    `versions` optionally maps listing_id to the version of the delete; a
+    listing already indexed at that version or newer is kept. Each delete
+    leaves a tombstone at the newest version it covers (the delete's, or the
+    removed listing's for an unversioned delete) that upsert_listings checks.
+    """
+    _require_mutable_backend()
+    versions = versions or {}
+    doc_ids = {listing_doc_id(listing_id): versions.get(listing_id) for listing_id in listing_ids}
+    if not doc_ids:
+        return {"deleted": 0}
+    
+    stored = _stored_versions(list(doc_ids))
+    deleted = _stored_versions(list(doc_ids), source=tombstones)
+    to_delete = [doc_id for doc_id, version in doc_ids.items()
+                 if doc_id in stored and (version is None or stored[doc_id] < version)]
+    if to_delete:
+        collection.delete(ids=to_delete)
     
-    results = collection.query(
-        query_embeddings=[query_embedding],
+    # Tombstone everything this call deleted or pre-empted (a delete that beat its listing here)
+    marks = {}
+    for listing_id in listing_ids:
+        doc_id = listing_doc_id(listing_id)
+        if doc_id in stored and doc_id not in to_delete:
+            continue
+        newest = max(doc_ids[doc_id] or 0, stored.get(doc_id, 0))
+        if newest > deleted.get(doc_id, 0):
+            marks[doc_id] = {"listing_id": str(listing_id), "version": newest}
+    if marks:
+        # Metadata-only records; the one-dimensional embedding is a placeholder Chroma requires
+        tombstones.upsert(ids=list(marks), embeddings=[[0.0]] * len(marks), metadatas=list(marks.values()))
+    return {"deleted": len(to_delete)}
+
+def _query_index(query, n_results):
+    """Embed the query and return Chroma-shaped results from the active backend"""
+    global mmap_store
+    query_embedding = embedding_model.encode(query)
+    
+    if VECTOR_BACKEND == "mmap":
+        # Opening only maps the files, so a process can search an index built elsewhere
+        if mmap_store is None:
+            mmap_store = MmapVectorStore(MMAP_INDEX_PATH)
+        return mmap_store.query(query_embedding, n_results)
+    
+    return collection.query(
+        query_embeddings=[query_embedding.tolist()],
         n_results=n_results
     )
+
+@profiled()
+def semantic_search(query, n_results=3):
+    """Search using semantic similarity"""
+    results = _query_index(query, n_results)
     
     return results['documents'][0]
 
-def rag_query(question):
+def semantic_search_with_scores(query, n_results=3):
+    """Search and also return cosine similarities (embeddings are unit-normalized)"""
+    results = _query_index(query, n_results)
+    
+    # Squared L2 between unit vectors is 2 - 2*cosine
+    similarities = [1 - d / 2 for d in results['distances'][0]]
+    return results['documents'][0], similarities
+
+def retrieve_context(question, n_results=2, rerank=None):
+    """Pick the documents for the answer prompt, optionally re-ranked"""
+    global reranker
+    if not (RAG_RERANK if rerank is None else rerank):
+        return semantic_search(question, n_results=n_results)
+    
+    if reranker is None:
+        reranker = get_reranker()
+    candidates, similarities = semantic_search_with_scores(question, n_results=max(RERANK_CANDIDATES, n_results))
+    relevant_docs, info = reranker.rerank(question, candidates, similarities, keep=n_results)
+    record_event("rerank", **info)
+    return relevant_docs
+
+@profiled()
+def rag_query(question, rerank=None):
     """RAG: Retrieve relevant docs + Generate answer"""
     # Retrieve relevant documents
-    relevant_docs = semantic_search(question, n_results=2)
+    relevant_docs = retrieve_context(question, n_results=2, rerank=rerank)
     
     # Create context
     context = "\n\n".join(relevant_docs)
@@ -1,15 +1,11 @@
-import os
 from dotenv import load_dotenv
-from openai import OpenAI
+from llm_client import get_client
 
 # Load environment variables
 load_dotenv()
 
-# Set up DeepSeek client (using OpenAI package)
-client = OpenAI(
-    api_key=os.getenv("DEEPSEEK_API_KEY"),
-    base_url="https://api.deepseek.com/v1"
-)
+# Shared DeepSeek client (rate limited with retries, see llm_client.py)
+client = get_client()
 
 # Test the connection
 def test_api():
@@ -0,0 +1,194 @@
+import argparse
+import json
+import os
+import threading
+import time
+from advanced_rag import upsert_listings, delete_listings
+
+
+def _event_version(event):
+    """Version carried by an event; None for an unversioned delete (always applied)"""
+    if event["op"] == "upsert":
+        return event["listing"].get("version", 1)
+    return event.get("version")
+
+
+def _event_listing_id(event):
+    return event["listing"]["listing_id"] if event["op"] == "upsert" else event["listing_id"]
+
+
+class ChangeFeedConsumer:
+    """Applies listing change events to the vector index in batches.
+
+    Events are {"op": "upsert", "listing": {listing_id, version, document, ...}}
+    or {"op": "delete", "listing_id": ..., "version": ...}. Pending events are
+    collapsed per listing (highest version wins) and applied once `batch_size`
+    listings are pending or the oldest has waited `max_delay` seconds, so a
+    change is searchable within roughly max_delay. Stale events are dropped
+    here when possible, but the guarantee that a late, older event never
+    resurrects a deleted listing or rolls back a price comes from the index
+    (upsert_listings checks delete tombstones). A batch that fails stays
+    pending and is retried with exponential backoff.
+    """
+
+    def __init__(self, batch_size=256, max_delay=1.0, upsert=upsert_listings, delete=delete_listings,
+                 max_retries=5, retry_delay=1.0):
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.upsert = upsert
+        self.delete = delete
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.pending = {}
+        self.versions = {}
+        self.stats = {"events": 0, "upserted": 0, "deleted": 0, "skipped_stale": 0, "batches": 0, "failed_batches": 0}
+        self.error = None
+        self._oldest = None
+        self._lock = threading.Lock()
+
+    def submit(self, event):
+        """Queue one event, flushing if the batch is full or overdue"""
+        listing_id = _event_listing_id(event)
+        version = _event_version(event)
+        with self._lock:
+            self.stats["events"] += 1
+            if version is not None and version <= self.versions.get(listing_id, 0):
+                self.stats["skipped_stale"] += 1
+                return
+            current = self.pending.get(listing_id)
+            if current is None or version is None or version >= (_event_version(current) or 0):
+                self.pending[listing_id] = event
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+        self.poll()
+
+    def poll(self):
+        """Flush if enough events are pending or the oldest one has waited max_delay"""
+        with self._lock:
+            due = bool(self.pending) and (len(self.pending) >= self.batch_size
+                                          or time.monotonic() - self._oldest >= self.max_delay)
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Apply everything pending now; on failure the events stay pending and the error is raised"""
+        with self._lock:
+            pending, oldest = self.pending, self._oldest
+            if not pending:
+                return
+            upserts = [event["listing"] for event in pending.values() if event["op"] == "upsert"]
+            deletes = {listing_id: event.get("version") for listing_id, event in pending.items()
+                       if event["op"] == "delete"}
+
+            # Upserts and deletes are version-checked, so replaying a half-applied batch is safe
+            try:
+                if upserts:
+                    upserted = self.upsert(upserts)
+                if deletes:
+                    deleted = self.delete(list(deletes), versions={k: v for k, v in deletes.items() if v is not None})
+            except Exception:
+                self.stats["failed_batches"] += 1
+                self._oldest = oldest
+                raise
+            self.pending, self._oldest = {}, None
+
+            if upserts:
+                self.stats["upserted"] += upserted["upserted"]
+                self.stats["skipped_stale"] += upserted["skipped_stale"]
+            if deletes:
+                self.stats["deleted"] += deleted["deleted"]
+            for listing_id, event in pending.items():
+                version = _event_version(event)
+                # An unversioned delete leaves the last known version; the index tombstone covers it
+                if version is not None:
+                    self.versions[listing_id] = version
+            self.stats["batches"] += 1
+
+    def _retry_flush(self, error):
+        """Retry a failed batch with exponential backoff; raise once max_retries run out"""
+        for attempt in range(self.max_retries):
+            delay = self.retry_delay * 2 ** attempt
+            print(f"⚠️  Change feed batch failed ({error}); retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+            time.sleep(delay)
+            try:
+                self.flush()
+                return
+            except Exception as e:
+                error = e
+        raise error
+
+    def consume(self, events):
+        """Apply an iterable of events; a None item is a heartbeat that only lets overdue batches flush"""
+        for event in events:
+            try:
+                if event is None:
+                    self.poll()
+                else:
+                    self.submit(event)
+            except Exception as e:
+                self._retry_flush(e)
+        try:
+            self.flush()
+        except Exception as e:
+            self._retry_flush(e)
+        return self.stats
+
+    def _run(self, events):
+        try:
+            self.consume(events)
+        except Exception as e:
+            # Nobody joins a daemon thread; keep the error where the app can see it
+            self.error = e
+            print(f"❌ Change feed stopped after {self.max_retries} retries: {e}")
+
+    def start(self, events):
+        """Consume `events` on a daemon thread (e.g. follow_jsonl inside the app process); see `error` if it stops"""
+        thread = threading.Thread(target=self._run, args=(events,), daemon=True)
+        thread.start()
+        return thread
+
+
+def follow_jsonl(path, poll_interval=0.5, follow=True):
+    """Yield events from a JSON-lines file, then keep tailing it (None between polls)"""
+    with open(path) as f:
+        while True:
+            position = f.tell()
+            line = f.readline()
+            if line.endswith("\n") or (line and not follow):
+                if line.strip():
+                    yield json.loads(line)
+            elif not follow:
+                return
+            else:
+                # Nothing new, or a line still being written: come back for it later
+                f.seek(position)
+                yield None
+                time.sleep(poll_interval)
+
+
+if __name__ == "__main__":
+    import synthetic_data
+    from advanced_rag import semantic_search
+
+    parser = argparse.ArgumentParser(description="Apply a listing change feed to the vector index")
+    parser.add_argument("events", nargs="?", help="JSON lines of change events (default: a synthetic feed)")
+    parser.add_argument("--listings", type=int, default=500, help="synthetic listings to load first")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--max-delay", type=float, default=1.0, help="seconds before a partial batch is applied")
+    parser.add_argument("--follow", action="store_true", help="keep tailing the events file")
+    args = parser.parse_args()
+
+    listings = list(synthetic_data.generate_listings(args.listings))
+    print(f"📥 Loading {len(listings)} listings...")
+    print(f"✅ {upsert_listings(listings)}")
+
+    consumer = ChangeFeedConsumer(batch_size=args.batch_size, max_delay=args.max_delay)
+    if args.events and os.path.exists(args.events):
+        stats = consumer.consume(follow_jsonl(args.events, follow=args.follow))
+    else:
+        events = list(synthetic_data.listing_change_events(listings, 200))
+        stats = consumer.consume(events)
+        changed = next(e["listing"] for e in reversed(events) if e["op"] == "upsert")
+        print(f"\n🔎 {changed['address']} after its price change:")
+        print(f"   {semantic_search(changed['document'], n_results=1)[0]}")
+    print(f"\n📊 Change feed: {stats}")
@@ -0,0 +1,187 @@
+import os
+import numpy as np
+
+EARTH_RADIUS_MILES = 3958.8
+
+# Dollar adjustments applied to a comp to make it look like the subject
+DEFAULT_ADJUSTMENTS = {
+    "bed": 12000,           # per bedroom
+    "bath": 8000,           # per bathroom
+    "year_built": 900,      # per year newer
+    "sqft_factor": 0.5,     # marginal $/sqft as a share of the comps' median $/sqft
+}
+
+
+def haversine_miles(lat, lon, lats, lons):
+    """Great-circle distance from one point to arrays of points"""
+    lat, lon = np.radians(lat), np.radians(lon)
+    lats, lons = np.radians(lats), np.radians(lons)
+    a = np.sin((lats - lat) / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(a))
+
+
+class CompsEngine:
+    """k-nearest comparable sales using a lat/lon grid index plus attribute distance.
+
+    Sales are bucketed into grid cells of `cell_degrees` and sorted by cell key,
+    so the candidates around a subject are a handful of contiguous slices found
+    with one vectorized searchsorted. Ranking and price adjustments are computed
+    over the candidate arrays in one pass.
+    """
+
+    _OFFSET = 1 << 19
+    _WIDTH = 1 << 20
+
+    def __init__(self, sales, cell_degrees=0.01, adjustments=None):
+        self.cell_degrees = cell_degrees
+        self.adjustments = dict(DEFAULT_ADJUSTMENTS, **(adjustments or {}))
+
+        self.ids = np.asarray([s["listing_id"] for s in sales])
+        self.addresses = np.asarray([s["address"] for s in sales])
+        self.zips = np.asarray([s["zip"] for s in sales])
+        self.lat = np.asarray([s["lat"] for s in sales], dtype=np.float64)
+        self.lon = np.asarray([s["lon"] for s in sales], dtype=np.float64)
+        self.beds = np.asarray([s["beds"] for s in sales], dtype=np.float64)
+        self.baths = np.asarray([s["baths"] for s in sales], dtype=np.float64)
+        self.sqft = np.asarray([s["sqft"] for s in sales], dtype=np.float64)
+        self.year_built = np.asarray([s["year_built"] for s in sales], dtype=np.float64)
+        self.price = np.asarray([s["sold_price"] for s in sales], dtype=np.float64)
+        self.sold_date = np.asarray([s.get("sold_date") or "" for s in sales])
+
+        # Attribute scales so a bedroom, 400 sqft and a decade weigh comparably
+        self.scales = {
+            "beds": max(float(self.beds.std()), 1.0) if len(sales) else 1.0,
+            "baths": max(float(self.baths.std()), 0.5) if len(sales) else 1.0,
+            "sqft": max(float(self.sqft.std()), 100.0) if len(sales) else 400.0,
+            "year_built": max(float(self.year_built.std()), 5.0) if len(sales) else 10.0,
+        }
+
+        keys = self._cell_keys(self.lat, self.lon)
+        self._order = np.argsort(keys, kind="stable")
+        self._sorted_keys = keys[self._order]
+
+        self.zip_centroids = {}
+        for code in np.unique(self.zips):
+            mask = self.zips == code
+            self.zip_centroids[str(code)] = (float(self.lat[mask].mean()), float(self.lon[mask].mean()))
+
+    @classmethod
+    def from_records(cls, records, **kwargs):
+        """Build from listing dicts (synthetic_data format); only closed sales are indexed"""
+        fields = ("listing_id", "address", "zip", "lat", "lon", "beds", "baths", "sqft",
+                  "year_built", "sold_price", "sold_date")
+        sales = [{f: r.get(f) for f in fields} for r in records
+                 if r.get("status") == "sold" and r.get("sold_price")]
+        return cls(sales, **kwargs)
+
+    def __len__(self):
+        return len(self.price)
+
+    def _cell_keys(self, lat, lon):
+        cy = np.floor(np.asarray(lat) / self.cell_degrees).astype(np.int64) + self._OFFSET
+        cx = np.floor(np.asarray(lon) / self.cell_degrees).astype(np.int64) + self._OFFSET
+        return cy * self._WIDTH + cx
+
+    def _candidates(self, lat, lon, min_candidates, max_radius_cells):
+        """Rows in the smallest square of cells around the subject holding enough sales"""
+        radius = 1
+        while True:
+            center = self._cell_keys(lat, lon)
+            # Keys in one grid row are contiguous, so each row of the square is one slice
+            row_starts = center + np.arange(-radius, radius + 1) * self._WIDTH - radius
+            lo = np.searchsorted(self._sorted_keys, row_starts, side="left")
+            hi = np.searchsorted(self._sorted_keys, row_starts + 2 * radius, side="right")
+            total = int((hi - lo).sum())
+
+            if total >= min_candidates or radius >= max_radius_cells:
+                if total == 0:
+                    return np.empty(0, dtype=np.int64)
+                return self._order[np.concatenate([np.arange(a, b) for a, b in zip(lo, hi)])]
+            radius *= 2
+
+    def find_comps(self, beds, baths, sqft, year_built, lat=None, lon=None, zip_code=None, k=6,
+                   max_miles=5.0, min_candidates=200, max_radius_cells=64):
+        """Return the k most similar sales and an adjusted price estimate for the subject"""
+        if sqft is None or sqft <= 0:
+            return {"error": "Subject square footage must be greater than 0"}
+        if k < 1:
+            return {"error": "Need at least one comparable sale (k >= 1)"}
+        if lat is None or lon is None:
+            if zip_code not in self.zip_centroids:
+                return {"error": "Need lat/lon or a zip code with recorded sales"}
+            lat, lon = self.zip_centroids[zip_code]
+
+        rows = self._candidates(lat, lon, max(min_candidates, k), max_radius_cells)
+        if len(rows) == 0:
+            return {"error": "No comparable sales found near the subject property"}
+
+        miles = haversine_miles(lat, lon, self.lat[rows], self.lon[rows])
+        within = miles <= max_miles
+        if within.sum() >= k:
+            rows, miles = rows[within], miles[within]
+
+        # Squared distance in normalized attribute space; one mile counts like one standard deviation
+        distance = (
+            miles ** 2
+            + ((self.beds[rows] - beds) / self.scales["beds"]) ** 2
+            + ((self.baths[rows] - baths) / self.scales["baths"]) ** 2
+            + ((self.sqft[rows] - sqft) / self.scales["sqft"]) ** 2
+            + ((self.year_built[rows] - year_built) / self.scales["year_built"]) ** 2
+        )
+        k = min(k, len(rows))
+        top = np.argpartition(distance, k - 1)[:k]
+        top = top[np.argsort(distance[top], kind="stable")]
+        rows, miles, distance = rows[top], miles[top], distance[top]
+
+        adjusted = self._adjusted_prices(rows, beds, baths, sqft, year_built)
+        weights = 1 / (np.sqrt(distance) + 0.1)
+        estimate = float(np.average(adjusted, weights=weights))
+
+        return {
+            "estimated_value": round(estimate, -3),
+            "estimated_price_per_sqft": round(estimate / sqft, 2),
+            "value_range": [round(float(adjusted.min()), -3), round(float(adjusted.max()), -3)],
+            "comps": [
+                {
+                    "listing_id": str(self.ids[r]),
+                    "address": str(self.addresses[r]),
+                    "zip": str(self.zips[r]),
+                    "beds": float(self.beds[r]),
+                    "baths": float(self.baths[r]),
+                    "sqft": int(self.sqft[r]),
+                    "year_built": int(self.year_built[r]),
+                    "sold_price": int(self.price[r]),
+                    "sold_date": str(self.sold_date[r]),
+                    "distance_miles": round(float(m), 2),
+                    "adjusted_price": round(float(a), -2),
+                }
+                for r, m, a in zip(rows, miles, adjusted)
+            ],
+        }
+
+    def _adjusted_prices(self, rows, beds, baths, sqft, year_built):
+        """Adjust each comp's sale price for its differences from the subject"""
+        adj = self.adjustments
+        price_per_sqft = float(np.median(self.price[rows] / self.sqft[rows]))
+        return (
+            self.price[rows]
+            + (sqft - self.sqft[rows]) * price_per_sqft * adj["sqft_factor"]
+            + (beds - self.beds[rows]) * adj["bed"]
+            + (baths - self.baths[rows]) * adj["bath"]
+            + (year_built - self.year_built[rows]) * adj["year_built"]
+        )
+
+
+# Shared engine for the agent tool, loaded on first use
+_engine = None
+
+
+def get_comps_engine(path=None):
+    """Load the sales history at COMPS_DATA_PATH (listings.jsonl.gz from synthetic_data.py)"""
+    global _engine
+    if _engine is None:
+        from synthetic_data import read_jsonl_gz
+
+        path = path or os.getenv("COMPS_DATA_PATH", "data/synthetic/listings.jsonl.gz")
+        _engine = CompsEngine.from_records(read_jsonl_gz(path))
+    return _engine
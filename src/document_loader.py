@@ -1,13 +1,9 @@
-import os
 from dotenv import load_dotenv
-from openai import OpenAI
+from llm_client import get_client
 
 load_dotenv()
 
-client = OpenAI(
-    api_key=os.getenv("DEEPSEEK_API_KEY"),
-    base_url="https://api.deepseek.com/v1"
-)
+client = get_client()
 
 # Sample real estate documents (we'll start simple)
 real_estate_docs = [
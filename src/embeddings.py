@@ -0,0 +1,185 @@
+import os
+import numpy as np
+
+DEFAULT_MODEL = "all-MiniLM-L6-v2"
+DEFAULT_TOKENIZER = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+class EmbeddingBackend:
+    """Common interface for local embedding models.
+
+    `encode` mirrors SentenceTransformer.encode: a single string returns a 1-D
+    vector, a list of strings returns a 2-D float32 array. Models are loaded on
+    first use so importing a module that owns a backend stays cheap.
+    """
+
+    name = "base"
+
+    def __init__(self, batch_size=64, threads=None):
+        self.batch_size = batch_size
+        self.threads = threads
+        self._model = None
+        self._dimension = None
+
+    def encode(self, texts, batch_size=None, **kwargs):
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        if self._model is None:
+            self._model = self._load()
+
+        if texts:
+            vectors = self._encode(texts, batch_size or self.batch_size)
+        else:
+            vectors = np.zeros((0, self.dimension), dtype=np.float32)
+        return vectors[0] if single else vectors
+
+    @property
+    def dimension(self):
+        if self._dimension is None:
+            self._dimension = self.encode("dimension probe").shape[0]
+        return self._dimension
+
+    def _load(self):
+        raise NotImplementedError
+
+    def _encode(self, texts, batch_size):
+        raise NotImplementedError
+
+
+class SentenceTransformerBackend(EmbeddingBackend):
+    """Reference backend: SentenceTransformer on PyTorch"""
+
+    name = "sentence-transformers"
+
+    def __init__(self, model_name=DEFAULT_MODEL, batch_size=64, threads=None):
+        super().__init__(batch_size, threads)
+        self.model_name = model_name
+
+    def _load(self):
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        if self.threads:
+            torch.set_num_threads(self.threads)
+        return SentenceTransformer(self.model_name)
+
+    def _encode(self, texts, batch_size):
+        vectors = self._model.encode(texts, batch_size=batch_size, convert_to_numpy=True)
+        return vectors.astype(np.float32, copy=False)
+
+
+class OnnxBackend(EmbeddingBackend):
+    """ONNX Runtime backend (fp32 or int8-quantized export of the same model)"""
+
+    name = "onnx"
+
+    def __init__(self, model_path, tokenizer_name=DEFAULT_TOKENIZER, batch_size=64, threads=None,
+                 max_length=256, normalize=True):
+        super().__init__(batch_size, threads)
+        self.model_path = model_path
+        self.tokenizer_name = tokenizer_name
+        self.max_length = max_length
+        self.normalize = normalize
+
+    def _load(self):
+        try:
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise ImportError("The ONNX embedding backend needs `pip install onnxruntime tokenizers`") from e
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.inter_op_num_threads = 1
+        if self.threads:
+            options.intra_op_num_threads = self.threads
+        self._session = ort.InferenceSession(self.model_path, options, providers=["CPUExecutionProvider"])
+        self._input_names = {i.name for i in self._session.get_inputs()}
+
+        self._tokenizer = Tokenizer.from_pretrained(self.tokenizer_name)
+        self._tokenizer.enable_truncation(max_length=self.max_length)
+        self._tokenizer.enable_padding()
+        return self._session
+
+    def _encode(self, texts, batch_size):
+        # Batch texts of similar length together so padding stays small
+        order = np.argsort([len(t) for t in texts], kind="stable")
+        vectors = None
+
+        for start in range(0, len(texts), batch_size):
+            idx = order[start:start + batch_size]
+            encodings = self._tokenizer.encode_batch([texts[i] for i in idx])
+            input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+            attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+            feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+            if "token_type_ids" in self._input_names:
+                feeds["token_type_ids"] = np.zeros_like(input_ids)
+
+            token_embeddings = self._session.run(None, feeds)[0]
+
+            # Mean pooling over real tokens, as SentenceTransformer does for this model
+            mask = attention_mask[..., None].astype(np.float32)
+            pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            if self.normalize:
+                pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+            if vectors is None:
+                vectors = np.empty((len(texts), pooled.shape[1]), dtype=np.float32)
+            vectors[idx] = pooled
+
+        return vectors
+
+
+def export_onnx(out_path, model_name=DEFAULT_TOKENIZER, quantize=False):
+    """Export the transformer to ONNX (needs torch + transformers); optionally int8-quantize it.
+
+    Returns the path of the model to load with OnnxBackend.
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name).eval()
+    sample = tokenizer(["export sample"], return_tensors="pt")
+
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (sample["input_ids"], sample["attention_mask"], sample["token_type_ids"]),
+            out_path,
+            input_names=["input_ids", "attention_mask", "token_type_ids"],
+            output_names=["last_hidden_state"],
+            dynamic_axes={name: {0: "batch", 1: "sequence"}
+                          for name in ["input_ids", "attention_mask", "token_type_ids", "last_hidden_state"]},
+            opset_version=14
+        )
+
+    if not quantize:
+        return out_path
+
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantized_path = out_path.replace(".onnx", ".int8.onnx")
+    quantize_dynamic(out_path, quantized_path, weight_type=QuantType.QInt8)
+    return quantized_path
+
+
+def get_embedding_backend(name=None):
+    """Build the backend selected by EMBEDDING_BACKEND (default: sentence-transformers)"""
+    name = name or os.getenv("EMBEDDING_BACKEND", SentenceTransformerBackend.name)
+    batch_size = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+    threads = int(os.getenv("EMBEDDING_THREADS", "0")) or None
+
+    if name == OnnxBackend.name:
+        model_path = os.getenv("EMBEDDING_ONNX_PATH")
+        if not model_path:
+            raise ValueError("EMBEDDING_BACKEND=onnx requires EMBEDDING_ONNX_PATH (see embeddings.export_onnx)")
+        return OnnxBackend(model_path, os.getenv("EMBEDDING_TOKENIZER", DEFAULT_TOKENIZER),
+                           batch_size=batch_size, threads=threads)
+
+    if name == SentenceTransformerBackend.name:
+        return SentenceTransformerBackend(os.getenv("EMBEDDING_MODEL", DEFAULT_MODEL),
+                                          batch_size=batch_size, threads=threads)
+
+    raise ValueError(f"Unknown embedding backend: {name}")
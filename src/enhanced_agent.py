@@ -1,24 +1,20 @@
-import os
 from dotenv import load_dotenv
-from openai import OpenAI
+from llm_client import get_client
 import json
-from advanced_rag import rag_query, setup_vector_database
+from advanced_rag import rag_query, ensure_vector_database
+from profiling import profiled
 
 load_dotenv()
 
-client = OpenAI(
-    api_key=os.getenv("DEEPSEEK_API_KEY"),
-    base_url="https://api.deepseek.com/v1"
-)
-
-# Initialize RAG database
-setup_vector_database()
+client = get_client()
 
 # Import tools from previous file
-from real_estate_agent import calculate_mortgage, property_comparison, affordability_check, tools
+from real_estate_agent import calculate_mortgage, property_comparison, affordability_check, find_comparable_sales, simulate_rental_portfolio, tools
 
 class RealEstateAgentWithMemory:
     def __init__(self):
+        # Index the knowledge base on first use (once per process), not at import
+        ensure_vector_database()
         self.conversation_history = []
         self.user_context = {}  # Store user preferences, budget, etc.
         
@@ -74,6 +70,7 @@ class RealEstateAgentWithMemory:
         
         return base_tools
     
+    @profiled()
     def chat(self, user_message):
         """Enhanced chat with memory and RAG"""
         
@@ -88,6 +85,8 @@ class RealEstateAgentWithMemory:
         # System message with context
         system_message = f"""You are an expert real estate agent AI assistant with access to:
 - Mortgage and affordability calculators
+- Comparable sales (comps) and value estimates
+- Rental portfolio simulations with percentile outcomes
 - Property search and market data
 - Conversation memory to personalize responses
 
@@ -133,6 +132,10 @@ Be conversational, helpful, and remember details about the client."""
                     result = property_comparison(**function_args)
                 elif function_name == "affordability_check":
                     result = affordability_check(**function_args)
+                elif function_name == "find_comparable_sales":
+                    result = find_comparable_sales(**function_args)
+                elif function_name == "simulate_rental_portfolio":
+                    result = simulate_rental_portfolio(**function_args)
                 elif function_name == "search_properties":
                     result = self.search_properties(function_args["query"])
                 elif function_name == "remember_user_info":
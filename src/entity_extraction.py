@@ -0,0 +1,240 @@
+import re
+
+# Dollar amounts: "$500K", "$1.2M", "450,000", "90k", "$2,500/month", "1.5 million"
+AMOUNT_RE = re.compile(
+    r"(?P<dollar>\$)?\s*(?P<number>\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?)\s*"
+    r"(?P<suffix>k|m|mm|thousand|million|mil)?\b"
+    r"(?P<period>\s*(?:/|per|a|an|each)\s*(?:mo|month|yr|year|annum)\b)?",
+    re.IGNORECASE,
+)
+PERCENT_RE = re.compile(r"(?P<number>\d+(?:\.\d+)?)\s*(?:%|percent\b|pct\b)", re.IGNORECASE)
+TERM_RE = re.compile(r"\b(?P<number>\d{1,2})[\s-]*(?:years?|yrs?)\b", re.IGNORECASE)
+
+SUFFIX_MULTIPLIERS = {"k": 1e3, "thousand": 1e3, "m": 1e6, "mm": 1e6, "million": 1e6, "mil": 1e6}
+
+# Context cues. Words after a number bind tightest ("$500 monthly debt"); otherwise
+# the cue closest before it wins ("I make $90K", "house at $450,000")
+INCOME_CUE = re.compile(r"\b(income|salary|earn\w*|make|making|paid|household|combined)\b")
+DEBT_CUE = re.compile(r"\b(debts?|car (?:loan|payment)s?|student loans?|credit cards?|loan payments?|owe|obligations?)\b")
+PRICE_CUE = re.compile(r"\b(homes?|house|condo|townhouse|propert(?:y|ies)|price[ds]?|listed|listing|costs?|"
+                       r"buy|purchase|afford|worth|offer|budget)\b")
+DOWN_CUE = re.compile(r"\bdown\b")
+RATE_CUE = re.compile(r"\b(rates?|interest|apr|at)\b")
+TERM_CUE = re.compile(r"\b(loan|mortgage|fixed|term|amortiz\w*)\b")
+AMOUNT_CUES = [("income", INCOME_CUE), ("monthly_debt", DEBT_CUE), ("price", PRICE_CUE)]
+PERCENT_CUES = [("down_payment_percent", DOWN_CUE), ("interest_rate", RATE_CUE)]
+
+INCOME_AFTER = re.compile(r"\s*(?:in |of )?(?:annual |yearly |household |combined )?(?:income|salary)")
+DEBT_AFTER = re.compile(r"\s*(?:in |of )?(?:monthly )?(?:debts?|credit cards?|car (?:loan|payment)s?|"
+                        r"loan payments?|student loans?)")
+PRICE_AFTER = re.compile(r"\s*(?:home|house|condo|property|townhouse|purchase)")
+DOWN_AFTER = re.compile(r"\s*down\b")
+DOWN_BEFORE = re.compile(r"\bdown(?: payment)?(?: of| is| would be)?\s*$")
+CLAUSE_END_RE = re.compile(r"[,;.!?]|\d")
+MONTHLY_WORD = re.compile(r"\bmonthly\b|\bpayments?\b|\beach month\b")
+RATE_AFTER = re.compile(r"\s*(?:interest|rate|apr|fixed)\b")
+MONTHLY_AFTER = re.compile(r"\s*(?:/|per|a|an|each)\s*mo")
+NOT_MONEY_AFTER = re.compile(r"\s*(?:sq|square|sf\b|beds?\b|bedrooms?|baths?\b|bathrooms?|br\b|ba\b)")
+
+# Any earlier number (with its unit), used to stop cues leaking from one value to the next
+NUMBER_TAIL_RE = re.compile(
+    r"\d[\d,.]*(?:\s*(?:%|k|m|mm|million|thousand|mil|years?|yrs?)\b)?"
+    r"(?:\s*(?:/|per|a|an|each)\s*(?:mo|month|yr|year|annum)\w*)?",
+    re.IGNORECASE,
+)
+
+CLAUSE_BREAK_RE = re.compile(r"[,;:.!?](?=\s)")
+
+# Bare 5-digit numbers are zip codes only with zip context ("in 78704") or a Texas zip shape
+ZIP_BEFORE = re.compile(r"\b(?:zip(?: ?code)?|in|near|around|area|tx|texas)\s*$")
+KNOWN_ZIP_RE = re.compile(r"^7[5-9]\d{3}$")
+
+# Words showing the user mentioned a field, whether or not its number could be read
+FIELD_MENTIONS = {
+    "price": PRICE_CUE,
+    "income": re.compile(r"\b(income|salary|earn\w*|making)\b"),
+    "monthly_debt": DEBT_CUE,
+    "down_payment_percent": re.compile(r"\bdown payment|[\d%k]\s*down\b|\bput\b.*\bdown\b"),
+    "interest_rate": re.compile(r"\b(interest|apr|mortgage rate)\b|\d\s*%\s*(?:rate|fixed)"),
+    "years": re.compile(r"\b\d{1,2}[\s-]*(?:years?|yrs?)\s*(?:fixed|loan|mortgage|term)|\bterm\b"),
+}
+
+# Confidence levels for how a value was identified
+EXPLICIT = 0.95     # a cue word labels the number
+INFERRED = 0.75     # the only plausible reading left (e.g. the one unlabeled large amount as the price)
+
+FINANCIAL_FIELDS = ("price", "income", "monthly_debt", "down_payment_percent", "interest_rate", "years")
+
+
+def _context(text, start, end, before=40, after=25):
+    """Lower-cased text around a match; `before` stops at the previous number or clause break"""
+    window = text[max(0, start - before):start]
+    cut = 0
+    for match in NUMBER_TAIL_RE.finditer(window):
+        cut = match.end()
+    for match in CLAUSE_BREAK_RE.finditer(window, cut):
+        cut = match.end()
+    return window[cut:].lower(), text[end:end + after].lower()
+
+
+def _closest_cue(before, cues):
+    """Field whose cue word ends nearest to the number"""
+    best, best_end = None, -1
+    for field, cue in cues:
+        for match in cue.finditer(before):
+            if match.end() > best_end:
+                best, best_end = field, match.end()
+    return best
+
+
+def _amount_value(match):
+    value = float(match.group("number").replace(",", ""))
+    suffix = (match.group("suffix") or "").lower()
+    return value * SUFFIX_MULTIPLIERS.get(suffix, 1.0)
+
+
+def _is_monthly(match, after):
+    period = (match.group("period") or "").lower()
+    return "mo" in period or bool(MONTHLY_AFTER.match(after))
+
+
+def _set(entities, field, value, confidence, source):
+    """Keep the most confident reading of each field"""
+    current = entities.get(field)
+    if current is None or confidence > current["confidence"]:
+        entities[field] = {"value": value, "confidence": confidence, "text": source}
+
+
+def extract_financial_entities(text):
+    """Pull price, income, monthly debt, down payment, rate and term out of a message.
+
+    Returns {field: {"value", "confidence", "text"}} for the fields found;
+    confidence is EXPLICIT when a cue word labels the number and INFERRED when
+    the field was filled by elimination. A dollar down payment ("$50k down")
+    becomes a percentage of the price. Debt without a monthly period is a
+    balance, not a payment, and is left for the LLM fallback to interpret.
+    """
+    entities = {}
+    consumed = []
+    unlabeled = []
+    down_amounts = []
+
+    for match in PERCENT_RE.finditer(text):
+        before, after = _context(text, match.start(), match.end())
+        value = float(match.group("number"))
+        consumed.append(match.span())
+        if DOWN_AFTER.match(after):
+            field = "down_payment_percent"
+        elif RATE_AFTER.match(after):
+            field = "interest_rate"
+        else:
+            field = _closest_cue(before, PERCENT_CUES)
+
+        # An unlabelled percentage ("prices rose 8%") is not assumed to be a rate
+        if field:
+            _set(entities, field, value, EXPLICIT, match.group(0))
+
+    for match in TERM_RE.finditer(text):
+        before, after = _context(text, match.start(), match.end(), before=20)
+        years = int(match.group("number"))
+        consumed.append(match.span())
+        if TERM_CUE.search(before + " " + after):
+            _set(entities, "years", years, EXPLICIT, match.group(0))
+        elif years in (10, 15, 20, 25, 30):
+            _set(entities, "years", years, INFERRED, match.group(0))
+
+    for match in AMOUNT_RE.finditer(text):
+        if any(start <= match.start("number") < end for start, end in consumed):
+            continue
+        has_dollar = bool(match.group("dollar"))
+        has_suffix = bool(match.group("suffix"))
+        number = match.group("number")
+        value = _amount_value(match)
+        before, after = _context(text, match.start(), match.end())
+
+        if not (has_dollar or has_suffix):
+            # Bare numbers are money only when large, and never years or sizes
+            if value < 1000 or NOT_MONEY_AFTER.match(after):
+                continue
+            if "," not in number and len(number) == 4 and 1900 <= value <= 2100:
+                continue
+
+        monthly = _is_monthly(match, after)
+        source = match.group(0).strip()
+        if DOWN_AFTER.match(after) or DOWN_BEFORE.search(before):
+            down_amounts.append((value, source))
+            continue
+        if INCOME_AFTER.match(after):
+            field = "income"
+        elif DEBT_AFTER.match(after):
+            field = "monthly_debt"
+        elif PRICE_AFTER.match(after):
+            field = "price"
+        else:
+            field = _closest_cue(before, AMOUNT_CUES)
+
+        if not (has_dollar or has_suffix) and "," not in number and len(number) == 5:
+            # Income and debt cues win; otherwise zip context or a zip-shaped number means a zip code
+            if field not in ("income", "monthly_debt") and (ZIP_BEFORE.search(before) or KNOWN_ZIP_RE.match(number)):
+                continue
+
+        if field == "income":
+            _set(entities, "income", value * 12 if monthly else value, EXPLICIT, source)
+        elif field == "monthly_debt":
+            # "I owe $15,000 on student loans" is a balance; only a monthly figure is a payment
+            if monthly or MONTHLY_WORD.search(before) or MONTHLY_WORD.search(CLAUSE_END_RE.split(after)[0]):
+                _set(entities, field, value, EXPLICIT, source)
+        elif field == "price" and monthly:
+            # A monthly amount ("budget is $3,000 a month") is never a purchase price
+            continue
+        elif field:
+            _set(entities, field, value, EXPLICIT, source)
+        elif not monthly:
+            unlabeled.append((value, source))
+
+    # Fill the price by elimination: the biggest unlabeled amount. It stays INFERRED,
+    # so the LLM fallback still runs; income and debt are never guessed this way.
+    for value, source in sorted(unlabeled, key=lambda item: -item[0]):
+        if "price" not in entities and value >= 20000:
+            _set(entities, "price", value, INFERRED, source)
+
+    if down_amounts and "price" in entities and "down_payment_percent" not in entities:
+        value, source = max(down_amounts)
+        if value < entities["price"]["value"]:
+            percent = round(value / entities["price"]["value"] * 100, 2)
+            confidence = min(EXPLICIT, entities["price"]["confidence"])
+            _set(entities, "down_payment_percent", percent, confidence, source)
+
+    return entities
+
+
+def is_confident(entities, text, required=("price",), threshold=0.9):
+    """True when the regex pass can be trusted without an LLM fallback.
+
+    Every required field, and every field the message mentions, must have been
+    extracted at or above the threshold. Fields the user never mentioned don't
+    count against it.
+    """
+    lowered = text.lower()
+    for field in FINANCIAL_FIELDS:
+        needed = field in required or FIELD_MENTIONS[field].search(lowered)
+        if needed and (field not in entities or entities[field]["confidence"] < threshold):
+            return False
+    return True
+
+
+def entity_values(entities):
+    """Flatten extracted entities to {field: value}"""
+    return {field: entity["value"] for field, entity in entities.items()}
+
+
+def merge_entities(entities, values, confidence, source="llm"):
+    """Fill fields from another extractor without overriding explicit regex matches"""
+    merged = dict(entities)
+    for field in FINANCIAL_FIELDS:
+        value = values.get(field)
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+            continue
+        if field not in merged or merged[field]["confidence"] < EXPLICIT:
+            merged[field] = {"value": float(value), "confidence": confidence, "text": source}
+    return merged
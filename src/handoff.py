@@ -0,0 +1,100 @@
+import re
+from llm_client import estimate_tokens
+
+# Sub-agents hand the coordinator structured facts instead of prose:
+#   {"agent": "financial", "findings": [short lines], "numbers": {name: value}, "citations": [source docs]}
+
+BULLET_RE = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s*")
+WORD_RE = re.compile(r"\w+")
+NUMBER_RE = re.compile(r"\d(?:[\d,.]*\d)?")
+
+
+def make_handoff(agent, findings=(), numbers=None, citations=()):
+    return {"agent": agent, "findings": list(findings), "numbers": dict(numbers or {}), "citations": list(citations)}
+
+
+def parse_findings(text, limit=4):
+    """One finding per line of an LLM reply, with bullets, numbering and headings dropped"""
+    findings = []
+    for line in (text or "").splitlines():
+        line = BULLET_RE.sub("", line).strip().strip("*").strip()
+        if line and not line.endswith(":"):
+            findings.append(line)
+    return findings[:limit]
+
+
+def _words(text):
+    return set(WORD_RE.findall(text.lower()))
+
+
+def _overlap(a, b):
+    """Share of the smaller word set found in the other; catches one text restating another"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / min(len(a), len(b))
+
+
+def _normalize(text):
+    return " ".join(text.lower().split())
+
+
+def compress_handoffs(handoffs, max_findings=8, max_citations=4, citation_tokens=800, threshold=0.9):
+    """Merge sub-agent handoffs into one, dropping repeated findings, numbers and sources.
+
+    Sources are only deduplicated when their text is identical; templated listings
+    that differ in a price or a street stay separate. They are kept whole, and
+    ones that would push the block past `citation_tokens` are dropped rather than
+    cut (the first always fits). A finding is a repeat when it shares `threshold`
+    of its words and all of its numbers with an earlier one.
+    """
+    numbers = {}
+    for handoff in handoffs:
+        for name, value in handoff["numbers"].items():
+            numbers.setdefault(name, value)
+
+    citations, seen_docs, used = [], set(), 0
+    for handoff in handoffs:
+        for doc in handoff["citations"]:
+            key = _normalize(doc)
+            if key in seen_docs or len(citations) >= max_citations:
+                continue
+            tokens = estimate_tokens(doc)
+            if citations and used + tokens > citation_tokens:
+                continue
+            citations.append(doc)
+            seen_docs.add(key)
+            used += tokens
+
+    findings, seen_findings = [], []
+    for handoff in handoffs:
+        for finding in handoff["findings"]:
+            words, figures = _words(finding), NUMBER_RE.findall(finding)
+            if any(_overlap(words, w) >= threshold and figures == f for w, f in seen_findings):
+                continue
+            findings.append((handoff["agent"], finding))
+            seen_findings.append((words, figures))
+
+    return {"numbers": numbers, "findings": findings[:max_findings], "citations": citations}
+
+
+def _format_number(value):
+    if isinstance(value, bool):
+        return "yes" if value else "no"
+    if isinstance(value, (int, float)):
+        return f"{value:,.0f}" if float(value).is_integer() else f"{value:,.2f}"
+    return str(value)
+
+
+def render_handoff(compressed):
+    """Compact text block for the synthesis prompt"""
+    lines = []
+    if compressed["numbers"]:
+        lines.append("Numbers:")
+        lines.extend(f"- {name.replace('_', ' ')}: {_format_number(value)}" for name, value in compressed["numbers"].items())
+    if compressed["findings"]:
+        lines.append("Findings:")
+        lines.extend(f"- [{agent}] {finding}" for agent, finding in compressed["findings"])
+    if compressed["citations"]:
+        lines.append("Sources:")
+        lines.extend(f"[{i}] {doc}" for i, doc in enumerate(compressed["citations"], 1))
+    return "\n".join(lines)
@@ -0,0 +1,210 @@
+import json
+import os
+import random
+import threading
+import time
+from types import SimpleNamespace
+from dotenv import load_dotenv
+from openai import OpenAI, RateLimitError, APITimeoutError, APIConnectionError, InternalServerError
+
+load_dotenv()
+
+# Errors worth retrying: provider throttling, timeouts, dropped connections and 5xx
+RETRYABLE_ERRORS = (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError)
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token)"""
+    return max(1, len(text) // 4)
+
+
+def estimate_request_tokens(messages, max_tokens):
+    """Tokens a request can consume: prompt estimate plus the completion ceiling"""
+    prompt = "".join(str(m.get("content") or "") if isinstance(m, dict) else str(m.content) for m in messages)
+    return estimate_tokens(prompt) + (max_tokens or 0)
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at `per_minute`.
+
+    `acquire` blocks until the amount is available (an amount larger than the
+    bucket only waits for a full bucket). `adjust` settles the difference once
+    the real cost is known, so the level may briefly go negative.
+    """
+
+    def __init__(self, per_minute, capacity=None):
+        self.rate = per_minute / 60.0
+        self.capacity = float(capacity or per_minute)
+        self.level = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, amount=1.0):
+        """Take `amount` from the bucket; returns the seconds spent waiting"""
+        amount = min(float(amount), self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self.level >= amount:
+                    self.level -= amount
+                    return waited
+                wait = (amount - self.level) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+    def adjust(self, amount):
+        with self._lock:
+            self._refill()
+            self.level = min(self.capacity, self.level - amount)
+
+
+class _InFlight:
+    """One upstream call that identical concurrent requests wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+class _Completions:
+    def __init__(self, wrapper):
+        self._wrapper = wrapper
+
+    def create(self, **kwargs):
+        return self._wrapper.create(**kwargs)
+
+
+class RateLimitedClient:
+    """Drop-in wrapper around an OpenAI-compatible client.
+
+    Keeps the `client.chat.completions.create(...)` interface and adds:
+    - requests-per-minute and tokens-per-minute token buckets
+    - jittered exponential backoff on throttling, timeouts and 5xx (honouring Retry-After)
+    - a per-call timeout
+    - coalescing: identical requests already in flight share one upstream call
+    """
+
+    def __init__(self, client, requests_per_minute=60, tokens_per_minute=100000, max_retries=4,
+                 base_delay=0.5, max_delay=20.0, timeout=60.0, coalesce=True):
+        self.client = client
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self.coalesce = coalesce
+        self.chat = SimpleNamespace(completions=_Completions(self))
+        self.stats = {"requests": 0, "upstream_calls": 0, "coalesced": 0, "retries": 0,
+                      "failures": 0, "throttled_seconds": 0.0}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def create(self, **kwargs):
+        with self._lock:
+            self.stats["requests"] += 1
+
+        # Streams can't be shared between callers
+        if not self.coalesce or kwargs.get("stream"):
+            return self._call_with_retries(kwargs)
+
+        key = json.dumps(kwargs, sort_keys=True, default=str)
+        with self._lock:
+            flight = self._in_flight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._in_flight[key] = _InFlight()
+            else:
+                self.stats["coalesced"] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.response
+
+        try:
+            flight.response = self._call_with_retries(kwargs)
+            return flight.response
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            flight.done.set()
+
+    def _call_with_retries(self, kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        estimate = estimate_request_tokens(kwargs.get("messages", []), kwargs.get("max_tokens"))
+        # acquire() never takes more than a full bucket, so settle against what it actually took
+        reserved = min(estimate, self.tokens.capacity) if self.tokens else 0
+
+        for attempt in range(self.max_retries + 1):
+            waited = self.requests.acquire() if self.requests else 0.0
+            waited += self.tokens.acquire(reserved) if self.tokens else 0.0
+
+            try:
+                with self._lock:
+                    self.stats["upstream_calls"] += 1
+                    self.stats["throttled_seconds"] += waited
+                response = self.client.chat.completions.create(**kwargs)
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    with self._lock:
+                        self.stats["failures"] += 1
+                    raise
+                with self._lock:
+                    self.stats["retries"] += 1
+                time.sleep(self._backoff(attempt, e))
+                continue
+
+            usage = getattr(response, "usage", None)
+            if self.tokens and usage is not None and getattr(usage, "total_tokens", None):
+                self.tokens.adjust(usage.total_tokens - reserved)
+            return response
+
+    def _backoff(self, attempt, error):
+        """Full-jitter exponential delay, or the provider's Retry-After when it sends one"""
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), self.max_delay)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+# Shared client for every module in the process
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """The process-wide DeepSeek client, configured by the LLM_* environment variables"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            # Retries live in the wrapper so they share the rate limits
+            upstream = OpenAI(
+                api_key=os.getenv("DEEPSEEK_API_KEY"),
+                base_url="https://api.deepseek.com/v1",
+                max_retries=0
+            )
+            _client = RateLimitedClient(
+                upstream,
+                requests_per_minute=float(os.getenv("LLM_REQUESTS_PER_MINUTE", "60")),
+                tokens_per_minute=float(os.getenv("LLM_TOKENS_PER_MINUTE", "100000")),
+                max_retries=int(os.getenv("LLM_MAX_RETRIES", "4")),
+                timeout=float(os.getenv("LLM_TIMEOUT", "60")),
+                coalesce=os.getenv("LLM_COALESCE", "1") == "1",
+            )
+    return _client
@@ -0,0 +1,41 @@
+import json
+import os
+import threading
+import time
+from collections import Counter, deque
+
+# JSON-lines sink for events; unset keeps them in memory only
+METRICS_PATH = os.getenv("METRICS_PATH")
+
+_lock = threading.Lock()
+counters = Counter()
+recent_events = deque(maxlen=1000)
+
+
+def record_event(name, **fields):
+    """Record one event: bumps `name` and a counter per string field value, keeps the event for inspection"""
+    event = {"event": name, "ts": round(time.time(), 3), **fields}
+    with _lock:
+        counters[name] += 1
+        for key, value in fields.items():
+            values = value if isinstance(value, (list, tuple)) else [value]
+            for v in values:
+                if isinstance(v, str):
+                    counters[f"{name}.{key}.{v}"] += 1
+        recent_events.append(event)
+        if METRICS_PATH:
+            with open(METRICS_PATH, "a") as f:
+                f.write(json.dumps(event) + "\n")
+    return event
+
+
+def snapshot():
+    """Current counters as a plain dict"""
+    with _lock:
+        return dict(counters)
+
+
+def reset():
+    with _lock:
+        counters.clear()
+        recent_events.clear()
@@ -0,0 +1,166 @@
+import json
+import os
+import numpy as np
+
+# Files making up an index at base path P:
+#   P.vectors.npy             (count, dim) float32/float16, opened with mmap_mode="r"
+#   P.ids.bin / .offsets.npy  UTF-8 ids, concatenated, with row offsets
+#   P.docs.bin / .offsets.npy UTF-8 documents, same layout
+#   P.meta.json               count, dim, dtype
+#
+# A rebuild removes P.meta.json before replacing any other file and publishes the
+# new one last with an atomic rename, so a complete meta.json means a complete index.
+
+
+class _StringColumn:
+    """Read-only strings stored as one UTF-8 blob plus an offsets array, both memory-mapped"""
+
+    def __init__(self, path):
+        self._offsets = np.load(f"{path}.offsets.npy", mmap_mode="r")
+        self._blob = np.memmap(f"{path}.bin", dtype=np.uint8, mode="r") if self._offsets[-1] else None
+
+    def __getitem__(self, row):
+        start, end = int(self._offsets[row]), int(self._offsets[row + 1])
+        return bytes(self._blob[start:end]).decode("utf-8") if end > start else ""
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+
+class _StringColumnWriter:
+    def __init__(self, path):
+        self.path = path
+        self._file = open(f"{path}.bin.tmp", "wb")
+        self._offsets = [0]
+
+    def add(self, values):
+        for value in values:
+            data = value.encode("utf-8")
+            self._file.write(data)
+            self._offsets.append(self._offsets[-1] + len(data))
+
+    def close(self):
+        """Finish the temporary files; publish() moves them into place"""
+        self._file.close()
+        np.save(f"{self.path}.offsets.tmp.npy", np.asarray(self._offsets, dtype=np.int64))
+
+    def publish(self):
+        os.replace(f"{self.path}.bin.tmp", f"{self.path}.bin")
+        os.replace(f"{self.path}.offsets.tmp.npy", f"{self.path}.offsets.npy")
+
+
+class MmapStoreWriter:
+    """Streams embeddings, ids and documents to disk; call close() to publish the index"""
+
+    def __init__(self, path, dim, dtype="float32"):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+        self.count = 0
+        self._raw = open(f"{path}.vectors.raw.tmp", "wb")
+        self._ids = _StringColumnWriter(f"{path}.ids")
+        self._docs = _StringColumnWriter(f"{path}.docs")
+
+    def add(self, ids, documents, vectors):
+        vectors = np.asarray(vectors)
+        if vectors.ndim != 2 or vectors.shape[1] != self.dim or len(ids) != len(vectors):
+            raise ValueError(f"Expected {len(ids)} vectors of dimension {self.dim}, got {vectors.shape}")
+        self._raw.write(np.ascontiguousarray(vectors, dtype=self.dtype).tobytes())
+        self._ids.add(ids)
+        self._docs.add(documents)
+        self.count += len(ids)
+
+    def close(self, block_rows=65536):
+        self._raw.close()
+        self._ids.close()
+        self._docs.close()
+
+        # Copy the raw rows into a proper .npy so readers get shape/dtype from the header
+        raw_path = f"{self.path}.vectors.raw.tmp"
+        tmp_path = f"{self.path}.vectors.tmp.npy"
+        out = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=self.dtype, shape=(self.count, self.dim))
+        if self.count:
+            raw = np.memmap(raw_path, dtype=self.dtype, mode="r", shape=(self.count, self.dim))
+            for start in range(0, self.count, block_rows):
+                out[start:start + block_rows] = raw[start:start + block_rows]
+            del raw
+        out.flush()
+        del out
+        os.remove(raw_path)
+
+        # Unpublish the old index first: a crash from here on leaves no meta.json, never a mix
+        meta_path = f"{self.path}.meta.json"
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        self._ids.publish()
+        self._docs.publish()
+        os.replace(tmp_path, f"{self.path}.vectors.npy")
+
+        with open(f"{meta_path}.tmp", "w") as f:
+            json.dump({"count": self.count, "dim": self.dim, "dtype": self.dtype.name}, f)
+        os.replace(f"{meta_path}.tmp", meta_path)
+        return MmapVectorStore(self.path)
+
+
+class MmapVectorStore:
+    """Exact top-k search over a memory-mapped embedding matrix.
+
+    Nothing is loaded at open time: the vectors are mapped read-only, so every
+    process that opens the same index shares one copy through the page cache.
+    Vectors are expected to be unit-normalized (dot product = cosine).
+    """
+
+    def __init__(self, path):
+        with open(f"{path}.meta.json") as f:
+            self.meta = json.load(f)
+        self.path = path
+        self.vectors = np.load(f"{path}.vectors.npy", mmap_mode="r")
+        self.ids = _StringColumn(f"{path}.ids")
+        self.documents = _StringColumn(f"{path}.docs")
+        # Trust the files themselves, not meta.json, for the row count
+        self.count = self.vectors.shape[0]
+        if len(self.ids) != self.count or len(self.documents) != self.count:
+            raise ValueError(f"Inconsistent index at {path}: {self.count} vectors, "
+                             f"{len(self.ids)} ids, {len(self.documents)} documents (rebuild in progress?)")
+
+    def __len__(self):
+        return self.count
+
+    def search(self, query_vectors, k=3, block_rows=65536):
+        """Return (row indices, cosine scores), each (n_queries, k), best first"""
+        queries = np.atleast_2d(np.asarray(query_vectors, dtype=np.float32))
+        k = min(k, self.count)
+        best_rows = np.empty((len(queries), 0), dtype=np.int64)
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+
+        for start in range(0, self.count, block_rows):
+            block = self.vectors[start:start + block_rows]
+            scores = queries @ block.T.astype(np.float32, copy=False)
+
+            # Top-k inside the block, then merge with the running best
+            if scores.shape[1] > k:
+                top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+                scores = np.take_along_axis(scores, top, axis=1)
+                rows = top + start
+            else:
+                rows = np.broadcast_to(np.arange(start, start + scores.shape[1]), scores.shape)
+
+            best_scores = np.concatenate([best_scores, scores], axis=1)
+            best_rows = np.concatenate([best_rows, rows], axis=1)
+            if best_scores.shape[1] > k:
+                keep = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+                best_scores = np.take_along_axis(best_scores, keep, axis=1)
+                best_rows = np.take_along_axis(best_rows, keep, axis=1)
+
+        order = np.argsort(-best_scores, axis=1, kind="stable")
+        return np.take_along_axis(best_rows, order, axis=1), np.take_along_axis(best_scores, order, axis=1)
+
+    def query(self, query_embeddings, n_results=3):
+        """Chroma-shaped results; distances are squared L2 between unit vectors (2 - 2*cosine)"""
+        rows, scores = self.search(query_embeddings, n_results)
+        return {
+            "ids": [[self.ids[r] for r in row] for row in rows.tolist()],
+            "documents": [[self.documents[r] for r in row] for row in rows.tolist()],
+            "distances": (2 - 2 * scores).tolist()
+        }
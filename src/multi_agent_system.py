@@ -1,73 +1,79 @@
-import os
 from dotenv import load_dotenv
-from openai import OpenAI
+from llm_client import get_client, estimate_tokens, RETRYABLE_ERRORS
 import json
-from advanced_rag import rag_query, setup_vector_database
+import time
+from advanced_rag import retrieve_context, ensure_vector_database
 from real_estate_agent import calculate_mortgage, property_comparison, affordability_check
+from entity_extraction import extract_financial_entities, is_confident, entity_values, merge_entities
+from routing import ROUTING_TOOL, ROUTING_TOOL_CHOICE, parse_routing
+from metrics import record_event
+from handoff import make_handoff, parse_findings, compress_handoffs, render_handoff
+from profiling import profiled
 
 load_dotenv()
 
-client = OpenAI(
-    api_key=os.getenv("DEEPSEEK_API_KEY"),
-    base_url="https://api.deepseek.com/v1"
-)
-
-# Initialize RAG
-setup_vector_database()
+client = get_client()
 
 class ResearchAgent:
     """Specializes in market research and data analysis"""
     
     def analyze_market(self, query):
-        """Research market trends and data"""
+        """Research market trends and data; returns a handoff of findings with their sources"""
+        # Get market data from RAG (documents only; synthesis sees them as sources)
+        market_data = retrieve_context(f"market trends investment {query}", n_results=2)
+        sources = "\n".join(f"- {doc}" for doc in market_data)
+        
         research_prompt = f"""
         As a real estate market research specialist, analyze this query: {query}
         
-        Provide insights on:
-        - Market trends
-        - Investment potential
-        - Risk factors
-        - Opportunities
+        Available data:
+        {sources}
         
-        Base your analysis on available data.
+        Give up to 4 findings on market trends, investment potential, risks and opportunities.
+        One finding per line, each under 25 words, no introduction.
         """
         
-        # Get market data from RAG
-        market_data = rag_query(f"market trends investment {query}")
-        
         response = client.chat.completions.create(
             model="deepseek-chat",
             messages=[
                 {"role": "system", "content": "You are a real estate market research specialist focused on data-driven analysis."},
-                {"role": "user", "content": f"{research_prompt}\n\nAvailable data: {market_data}"}
+                {"role": "user", "content": research_prompt}
             ],
-            max_tokens=400
+            max_tokens=160
         )
         
-        return response.choices[0].message.content
+        return make_handoff("research", findings=parse_findings(response.choices[0].message.content), citations=market_data)
 
 class FinancialAgent:
     """Specializes in financial analysis and calculations"""
     
-    def financial_analysis(self, price, income, down_payment_percent=20, interest_rate=6.5):
-        """Comprehensive financial analysis"""
-        
-        # Use existing tools
-        mortgage_calc = calculate_mortgage(price, down_payment_percent, interest_rate, 30)
-        affordability = affordability_check(income, 0, price)  # Assuming no other debt for simplicity
-        
+    def financial_analysis(self, price, income=None, down_payment_percent=20, interest_rate=6.5, monthly_debt=0, years=30):
+        """Mortgage and affordability numbers plus short recommendations, as a handoff"""
+        
+        # Use existing tools; the numbers go to synthesis as-is
+        numbers = {
+            "price": price,
+            "down_payment_percent": down_payment_percent,
+            "interest_rate": interest_rate,
+            "loan_years": years
+        }
+        mortgage_calc = calculate_mortgage(price, down_payment_percent, interest_rate, years)
+        if "error" not in mortgage_calc:
+            numbers.update(mortgage_calc)
+        if income:
+            numbers["annual_income"] = income
+            affordability = affordability_check(income, monthly_debt, price)
+            if "error" not in affordability:
+                numbers["can_afford"] = affordability["can_afford"]
+                numbers["recommended_max_payment"] = affordability["recommended_max_payment"]
+        
+        facts = "\n".join(f"- {name}: {value}" for name, value in numbers.items())
         analysis_prompt = f"""
-        As a financial advisor, provide comprehensive analysis for:
-        - Property price: ${price:,}
-        - Buyer income: ${income:,}
-        - Mortgage details: {mortgage_calc}
-        - Affordability check: {affordability}
-        
-        Provide recommendations on:
-        1. Monthly budget impact
-        2. Long-term financial implications
-        3. Alternative scenarios
-        4. Financial recommendations
+        As a financial advisor, review this purchase:
+        {facts}
+        
+        Give up to 3 recommendations (budget impact, long-term implications, alternatives).
+        One per line, each under 25 words, no introduction. Don't restate the numbers.
         """
         
         response = client.chat.completions.create(
@@ -76,48 +82,91 @@ class FinancialAgent:
                 {"role": "system", "content": "You are a financial advisor specializing in real estate purchases."},
                 {"role": "user", "content": analysis_prompt}
             ],
-            max_tokens=400
+            max_tokens=120
         )
         
-        return response.choices[0].message.content
+        findings = parse_findings(response.choices[0].message.content, limit=3)
+        if not income:
+            findings.insert(0, "Affordability not assessed: the user did not give an income.")
+        return make_handoff("financial", findings=findings, numbers=numbers)
 
 class CustomerAgent:
     """Handles customer interactions and coordinates other agents"""
     
     def __init__(self):
+        # Index the knowledge base on first use (once per process), not at import
+        ensure_vector_database()
         self.research_agent = ResearchAgent()
         self.financial_agent = FinancialAgent()
         self.conversation_memory = []
     
-    def coordinate_response(self, user_message):
-        """Decide which agents to involve and coordinate response"""
-        
-        # Determine what type of help is needed
-        coordinator_prompt = f"""
+    def llm_extract_financials(self, user_message, entities):
+        """Ask the LLM for the numbers regex extraction was not confident about"""
+        extraction_prompt = f"""
         User message: "{user_message}"
         
-        Determine if this requires:
-        1. Market research (trends, investment, neighborhoods)
-        2. Financial analysis (affordability, mortgages, budgets)  
-        3. General real estate advice
-        4. Property search
+        Extract these numbers if the user stated them (omit anything not stated):
+        price, income (annual), monthly_debt (monthly payments, not balances), down_payment_percent, interest_rate, years
         
-        Respond with JSON: {{"needs": ["research", "financial", "search"], "priority": "primary_need"}}
+        Respond with JSON only, e.g. {{"price": 500000, "income": 90000}}
         """
         
         response = client.chat.completions.create(
             model="deepseek-chat",
             messages=[
-                {"role": "system", "content": "You are a coordinator who determines what type of real estate help is needed."},
-                {"role": "user", "content": coordinator_prompt}
+                {"role": "system", "content": "You extract numeric values from real estate questions."},
+                {"role": "user", "content": extraction_prompt}
             ],
-            max_tokens=100
+            max_tokens=80
         )
         
         try:
-            needs = json.loads(response.choices[0].message.content)
-        except:
-            needs = {"needs": ["search"], "priority": "search"}
+            values = json.loads(response.choices[0].message.content)
+        except (json.JSONDecodeError, TypeError):
+            return entities
+        if not isinstance(values, dict):
+            return entities
+        return merge_entities(entities, values, confidence=0.8)
+    
+    @profiled()
+    def coordinate_response(self, user_message):
+        """Decide which agents to involve and coordinate response"""
+        
+        # Route with a forced, schema-constrained function call; repair or fall back locally
+        coordinator_prompt = f"""
+        User message: "{user_message}"
+        
+        Decide which specialists are needed:
+        - research: market trends, investment, neighborhoods
+        - financial: affordability, mortgages, budgets
+        - search: specific properties or general real estate advice
+        """
+        
+        start = time.perf_counter()
+        try:
+            response = client.chat.completions.create(
+                model="deepseek-chat",
+                messages=[
+                    {"role": "system", "content": "You are a coordinator who determines what type of real estate help is needed. Always answer by calling route_request."},
+                    {"role": "user", "content": coordinator_prompt}
+                ],
+                tools=[ROUTING_TOOL],
+                tool_choice=ROUTING_TOOL_CHOICE,
+                max_tokens=60
+            )
+            message = response.choices[0].message
+        except RETRYABLE_ERRORS:
+            # Provider still failing after retries: route locally instead of failing the turn
+            message = None
+        
+        needs, source = parse_routing(message, user_message)
+        record_event(
+            "routing_decision",
+            needs=needs["needs"],
+            priority=needs["priority"],
+            source=source,
+            latency_ms=round((time.perf_counter() - start) * 1000, 1)
+        )
         
         # Collect responses from needed agents
         agent_responses = {}
@@ -126,40 +175,47 @@ class CustomerAgent:
             agent_responses["research"] = self.research_agent.analyze_market(user_message)
         
         if "financial" in needs["needs"]:
-            # Extract price and income if mentioned
-            try:
-                # Simple extraction - in production would be more sophisticated
-                words = user_message.split()
-                price = 500000  # Default
-                income = 80000   # Default
-                
-                for i, word in enumerate(words):
-                    if '$' in word or 'price' in word.lower():
-                        try:
-                            price = int(''.join(filter(str.isdigit, word)))
-                        except:
-                            pass
-                    if 'income' in word.lower() and i < len(words)-1:
-                        try:
-                            income = int(''.join(filter(str.isdigit, words[i+1])))
-                        except:
-                            pass
-                
-                agent_responses["financial"] = self.financial_agent.financial_analysis(price, income)
-            except:
-                agent_responses["financial"] = "Financial analysis requires property price and income information."
+            # Deterministic extraction first; the LLM only fills in what it could not pin down
+            entities = extract_financial_entities(user_message)
+            if not is_confident(entities, user_message):
+                entities = self.llm_extract_financials(user_message, entities)
+            values = entity_values(entities)
+            
+            if "price" in values:
+                agent_responses["financial"] = self.financial_agent.financial_analysis(
+                    values["price"],
+                    values.get("income"),
+                    down_payment_percent=values.get("down_payment_percent", 20),
+                    interest_rate=values.get("interest_rate", 6.5),
+                    monthly_debt=values.get("monthly_debt", 0),
+                    years=int(values.get("years", 30))
+                )
+            else:
+                agent_responses["financial"] = make_handoff(
+                    "financial", findings=["Financial analysis requires the property price; ask the user for it."]
+                )
         
         if "search" in needs["needs"]:
-            agent_responses["search"] = rag_query(user_message)
+            # Retrieved listings go straight to synthesis as sources, no separate RAG answer
+            agent_responses["search"] = make_handoff("search", citations=retrieve_context(user_message, n_results=2))
+        
+        # Compress handoffs: one deduplicated block of numbers, findings and sources
+        handoff_text = render_handoff(compress_handoffs(list(agent_responses.values())))
+        record_event(
+            "handoff",
+            agents=list(agent_responses),
+            handoff_tokens=estimate_tokens(handoff_text)
+        )
         
         # Synthesize final response
         synthesis_prompt = f"""
         User asked: "{user_message}"
         
-        Agent responses:
-        {json.dumps(agent_responses, indent=2)}
+        Specialist handoff:
+        {handoff_text}
         
-        Provide a comprehensive, helpful response that synthesizes insights from all agents.
+        Provide a comprehensive, helpful response that synthesizes these facts.
+        Use the numbers as given and rely on the sources for property details.
         Be conversational and focus on what's most important for the user.
         """
         
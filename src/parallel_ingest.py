@@ -0,0 +1,128 @@
+import itertools
+import multiprocessing as mp
+import os
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from embeddings import get_embedding_backend
+
+# Per-process embedding model, created once by _init_worker
+_worker_backend = None
+
+
+def _init_worker(backend_name, threads, batch_size):
+    """Load one embedding model per worker process, pinned to its share of the cores"""
+    global _worker_backend
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    _worker_backend = get_embedding_backend(backend_name)
+    _worker_backend.threads = threads
+    _worker_backend.batch_size = batch_size
+
+
+def _embed_shard(shard_id, texts, out_dir):
+    """Encode one shard and write the vectors to a .npy file the writer memory-maps"""
+    start = time.perf_counter()
+    vectors = _worker_backend.encode(texts)
+    path = os.path.join(out_dir, f"shard_{shard_id:08d}.npy")
+    np.save(path, np.ascontiguousarray(vectors, dtype=np.float32))
+    return path, len(texts), time.perf_counter() - start, os.getpid()
+
+
+def _shards(docs, shard_size):
+    """Yield (shard_id, offset, texts) without materializing the whole input"""
+    iterator = iter(docs)
+    for shard_id in itertools.count():
+        texts = list(itertools.islice(iterator, shard_size))
+        if not texts:
+            return
+        yield shard_id, shard_id * shard_size, texts
+
+
+def parallel_ingest(docs, add_batch, workers=None, shard_size=2048, batch_size=64,
+                    backend_name=None, scratch_dir=None):
+    """Embed `docs` across a process pool and commit them from this (single writer) process.
+
+    `add_batch(texts, vectors, offset)` is called once per shard, in completion
+    order, with `vectors` memory-mapped from the worker's output file. Workers are
+    started with the spawn method, so call this from a `__main__`-guarded script.
+    Returns throughput stats, including per-worker docs/s.
+    """
+    workers = workers or os.cpu_count() or 1
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    backend_name = backend_name or os.getenv("EMBEDDING_BACKEND", "sentence-transformers")
+
+    per_worker = {}
+    total = 0
+    start = time.perf_counter()
+
+    with tempfile.TemporaryDirectory(prefix="ingest_", dir=scratch_dir) as out_dir, \
+            ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn"),
+                                initializer=_init_worker,
+                                initargs=(backend_name, threads, batch_size)) as pool:
+        shards = _shards(docs, shard_size)
+        in_flight = {}
+
+        def submit_next():
+            shard = next(shards, None)
+            if shard is None:
+                return False
+            shard_id, offset, texts = shard
+            in_flight[pool.submit(_embed_shard, shard_id, texts, out_dir)] = (offset, texts)
+            return True
+
+        # Keep two shards queued per worker: enough to hide the writer, bounded memory
+        while len(in_flight) < workers * 2 and submit_next():
+            pass
+
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                offset, texts = in_flight.pop(future)
+                path, count, seconds, pid = future.result()
+
+                vectors = np.load(path, mmap_mode="r")
+                add_batch(texts, vectors, offset)
+                del vectors
+                os.remove(path)
+
+                stats = per_worker.setdefault(pid, {"docs": 0, "seconds": 0.0})
+                stats["docs"] += count
+                stats["seconds"] += seconds
+                total += count
+                submit_next()
+
+    elapsed = time.perf_counter() - start
+    return {
+        "docs": total,
+        "seconds": round(elapsed, 3),
+        "docs_per_sec": round(total / elapsed, 1) if elapsed else 0.0,
+        "workers": {
+            pid: {"docs": s["docs"], "docs_per_sec": round(s["docs"] / s["seconds"], 1) if s["seconds"] else 0.0}
+            for pid, s in per_worker.items()
+        }
+    }
+
+
+def print_ingest_stats(stats):
+    print(f"✅ Ingested {stats['docs']:,} documents in {stats['seconds']}s ({stats['docs_per_sec']:,} docs/s)")
+    for pid, worker in sorted(stats["workers"].items()):
+        print(f"   worker {pid}: {worker['docs']:,} docs @ {worker['docs_per_sec']:,} docs/s")
+
+
+if __name__ == "__main__":
+    import argparse
+    import advanced_rag
+    from synthetic_data import read_jsonl_gz
+
+    parser = argparse.ArgumentParser(description="Parallel re-index of a listings feed")
+    parser.add_argument("path", help="listings.jsonl.gz written by synthetic_data.py")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--shard-size", type=int, default=2048)
+    args = parser.parse_args()
+
+    documents = (record["document"] for record in read_jsonl_gz(args.path))
+    advanced_rag.setup_vector_database(documents, workers=args.workers, shard_size=args.shard_size)
@@ -0,0 +1,201 @@
+import numpy as np
+
+# Market assumptions; every key can be overridden per call
+DEFAULT_ASSUMPTIONS = {
+    "years": 10,                     # holding period
+    "rent_growth_mean": 0.03,
+    "rent_growth_vol": 0.02,
+    "appreciation_mean": 0.04,
+    "appreciation_vol": 0.06,
+    "market_correlation": 0.6,       # share of rent/price shocks common to all properties
+    "rate_sensitivity": 2.0,         # appreciation lost per unit rise in rates
+    "vacancy_mean": 0.06,
+    "vacancy_vol": 0.03,
+    "expense_growth": 0.03,
+    "rate_start": 6.5,               # % mortgage rate today
+    "rate_mean": 5.5,                # long-run % rate (Vasicek mean)
+    "rate_reversion": 0.25,
+    "rate_vol": 0.8,                 # % points per year
+    "discount_rate": 0.08,
+    "closing_costs_percent": 3.0,
+    "selling_costs_percent": 6.0,
+}
+
+# Per-property defaults when a field is not supplied
+DEFAULT_PROPERTY = {
+    "down_payment_percent": 20,
+    "loan_years": 30,
+    "expense_ratio": 0.35,           # operating expenses as a share of gross rent
+    "adjustable_rate": False,        # True: rate resets yearly to the rate path + margin
+    "rate_margin": 0.0,
+}
+
+PERCENTILES = [5, 25, 50, 75, 95]
+
+
+def _monthly_payment(balance, annual_rate_percent, months_left):
+    """Level monthly payment on an amortizing loan (vectorized, zero-rate safe)"""
+    i = annual_rate_percent / 100 / 12
+    growth = (1 + i) ** months_left
+    safe_i = np.where(i == 0, 1.0, i)
+    return np.where(i == 0, balance / months_left, balance * safe_i * growth / np.where(i == 0, 1.0, growth - 1))
+
+
+def _balance_after_year(balance, annual_rate_percent, monthly_payment):
+    """Remaining principal after twelve monthly payments"""
+    i = annual_rate_percent / 100 / 12
+    growth = (1 + i) ** 12
+    safe_i = np.where(i == 0, 1.0, i)
+    paid_down = np.where(i == 0, monthly_payment * 12, monthly_payment * (growth - 1) / safe_i)
+    return np.maximum(balance * growth - paid_down, 0.0)
+
+
+def _irr(cash_flows, low=-0.99, high=1.0, iterations=80):
+    """IRR for every path at once by bisection; cash_flows has shape (paths, periods)"""
+    periods = np.arange(cash_flows.shape[1])
+    low = np.full(len(cash_flows), low)
+    high = np.full(len(cash_flows), high)
+
+    def npv(rate):
+        return (cash_flows / (1 + rate[:, None]) ** periods).sum(axis=1)
+
+    npv_low = npv(low)
+    # No sign change means no IRR in range (e.g. the investment never pays back)
+    has_root = np.sign(npv_low) != np.sign(npv(high))
+    for _ in range(iterations):
+        mid = (low + high) / 2
+        npv_mid = npv(mid)
+        same_sign = np.sign(npv_mid) == np.sign(npv_low)
+        low = np.where(same_sign, mid, low)
+        npv_low = np.where(same_sign, npv_mid, npv_low)
+        high = np.where(same_sign, high, mid)
+
+    return np.where(has_root, (low + high) / 2, np.nan)
+
+
+def _summary(values, decimals=4):
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return None
+    stats = {f"p{q}": round(float(v), decimals) for q, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))}
+    stats["mean"] = round(float(values.mean()), decimals)
+    return stats
+
+
+def simulate_portfolio(properties, n_paths=10000, seed=42, **assumptions):
+    """Monte Carlo cash-flow projection for a rental portfolio.
+
+    Each property needs `price` and `monthly_rent`; see DEFAULT_PROPERTY for
+    optional fields. Simulates `n_paths` yearly paths of rates, rent growth,
+    vacancy and appreciation (vectorized over paths x properties) and returns
+    percentile summaries of IRR, cash-on-cash, cap rate and NPV. The same seed
+    always gives the same result.
+    """
+    a = dict(DEFAULT_ASSUMPTIONS, **assumptions)
+    props = [dict(DEFAULT_PROPERTY, **p) for p in properties]
+    if not props:
+        raise ValueError("At least one property is required")
+    years = int(a["years"])
+    if years < 1:
+        raise ValueError("years must be at least 1")
+    if n_paths < 1:
+        raise ValueError("n_paths must be at least 1")
+
+    rng = np.random.default_rng(seed)
+    n_props = len(props)
+
+    price = np.array([p["price"] for p in props], dtype=np.float64)
+    rent = np.array([p["monthly_rent"] * 12 for p in props], dtype=np.float64)
+    expense_ratio = np.array([p["expense_ratio"] for p in props], dtype=np.float64)
+    expenses = rent * expense_ratio
+    down = price * np.array([p["down_payment_percent"] for p in props]) / 100
+    equity = down + price * a["closing_costs_percent"] / 100
+    loan_months = np.array([p["loan_years"] * 12 for p in props], dtype=np.float64)
+    adjustable = np.array([p["adjustable_rate"] for p in props], dtype=bool)
+    margin = np.array([p["rate_margin"] for p in props], dtype=np.float64)
+    fixed_rate = np.array([p.get("interest_rate", a["rate_start"]) for p in props], dtype=np.float64)
+
+    # State per (path, property)
+    shape = (n_paths, n_props)
+    balance = np.broadcast_to(price - down, shape).copy()
+    value = np.broadcast_to(price, shape).copy()
+    rent_t = np.broadcast_to(rent, shape).copy()
+    expenses_t = np.broadcast_to(expenses, shape).copy()
+    rate = np.full(n_paths, a["rate_start"], dtype=np.float64)
+    loan_rate = np.broadcast_to(fixed_rate, shape).copy()
+    payment = np.broadcast_to(_monthly_payment(price - down, fixed_rate, loan_months), shape).copy()
+
+    cash_flows = np.zeros((n_paths, n_props, years + 1))
+    cash_flows[:, :, 0] = -equity
+    first_noi = None
+    corr = a["market_correlation"]
+
+    for t in range(1, years + 1):
+        # Adjustable loans re-amortize the remaining balance at this year's rate
+        months_left = np.maximum(loan_months - 12 * (t - 1), 1)
+        reset_rate = np.where(adjustable, rate[:, None] + margin, loan_rate)
+        payment = np.where(adjustable, _monthly_payment(balance, reset_rate, months_left), payment)
+        loan_rate = reset_rate
+
+        market = rng.standard_normal((n_paths, 1))
+        rent_shock = corr * market + np.sqrt(1 - corr ** 2) * rng.standard_normal(shape)
+        market = rng.standard_normal((n_paths, 1))
+        value_shock = corr * market + np.sqrt(1 - corr ** 2) * rng.standard_normal(shape)
+        vacancy = np.clip(a["vacancy_mean"] + a["vacancy_vol"] * rng.standard_normal(shape), 0.0, 0.5)
+
+        noi = rent_t * (1 - vacancy) - expenses_t
+        if first_noi is None:
+            first_noi = noi
+        debt_service = np.where(balance > 0, payment * 12, 0.0)
+        cash_flows[:, :, t] = noi - debt_service
+        balance = _balance_after_year(balance, loan_rate, payment)
+
+        # Mortgage rate path (Vasicek), shared by every property on a path
+        previous_rate = rate
+        rate = rate + a["rate_reversion"] * (a["rate_mean"] - rate) + a["rate_vol"] * rng.standard_normal(n_paths)
+        rate = np.maximum(rate, 0.0)
+
+        rent_t = rent_t * (1 + a["rent_growth_mean"] + a["rent_growth_vol"] * rent_shock)
+        expenses_t = expenses_t * (1 + a["expense_growth"])
+        rate_change = (rate - previous_rate)[:, None] / 100
+        value = value * (1 + a["appreciation_mean"] + a["appreciation_vol"] * value_shock
+                         - a["rate_sensitivity"] * rate_change)
+
+    # Yearly operating cash flow per property, before the sale lands in the final year
+    operating = cash_flows[:, :, 1:].copy()
+    sale_proceeds = value * (1 - a["selling_costs_percent"] / 100) - balance
+    cash_flows[:, :, years] += sale_proceeds
+
+    discount = (1 + a["discount_rate"]) ** np.arange(years + 1)
+    portfolio_flows = cash_flows.sum(axis=1)
+    total_equity = equity.sum()
+
+    per_property = []
+    property_npv = (cash_flows / discount).sum(axis=2)
+    for j, p in enumerate(props):
+        per_property.append({
+            "name": p.get("name", f"Property {j + 1}"),
+            "cap_rate_year1": _summary(first_noi[:, j] / price[j]),
+            "cash_on_cash_year1": _summary(operating[:, j, 0] / equity[j]),
+            "npv": _summary(property_npv[:, j], 0),
+        })
+
+    irr = _irr(portfolio_flows)
+    npv = (portfolio_flows / discount).sum(axis=1)
+    portfolio_operating = operating.sum(axis=1)
+
+    return {
+        "paths": n_paths,
+        "years": years,
+        "seed": seed,
+        "equity_invested": round(float(total_equity), 2),
+        "irr": _summary(irr),
+        "npv": _summary(npv, 0),
+        "cash_on_cash_year1": _summary(portfolio_operating[:, 0] / total_equity),
+        "cash_on_cash_average": _summary(portfolio_operating.mean(axis=1) / total_equity),
+        "cap_rate_year1": _summary(first_noi.sum(axis=1) / price.sum()),
+        "probability_negative_npv": round(float((npv < 0).mean()), 4),
+        "probability_negative_irr": round(float((np.nan_to_num(irr, nan=-1.0) < 0).mean()), 4),
+        "ending_rate_percent": _summary(rate, 2),
+        "properties": per_property,
+    }
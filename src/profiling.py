@@ -0,0 +1,227 @@
+import argparse
+import contextvars
+import functools
+import itertools
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from metrics import record_event
+
+# PROFILE=1 profiles every decorated entry point in this process; profile_request()
+# turns it on for a single request instead. Off, the decorator costs one flag check.
+PROFILE_ENABLED = os.getenv("PROFILE", "0") == "1"
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_ALLOCATIONS = os.getenv("PROFILE_ALLOCATIONS", "1") == "1"
+MAX_STACK_DEPTH = 200
+
+_requested = contextvars.ContextVar("profile_requested", default=False)
+_session = contextvars.ContextVar("profile_session", default=None)
+
+# tracemalloc is process-wide; concurrent sessions share it and the last one out stops it
+_tracing_lock = threading.Lock()
+_tracing_sessions = 0
+
+# Keeps file names unique when several sessions finish within the same second
+_file_counter = itertools.count(1)
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    # ';' separates frames in folded stacks
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ":")
+
+
+class SamplingProfiler:
+    """Samples one thread's Python stack every `interval_ms` from a background thread.
+
+    Stacks are counted in folded form ("outer;inner;leaf count" lines), which
+    flamegraph.pl, speedscope and inferno all read directly. Only the profiled
+    thread is sampled; work it hands to other threads or processes shows up as
+    the frame that waits on them.
+    """
+
+    def __init__(self, thread_id=None, interval_ms=PROFILE_INTERVAL_MS):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval_ms / 1000
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self
+
+    def folded(self):
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+
+class ProfileSession:
+    """One profiled call: stack samples, allocation diff and the decorated calls made inside it"""
+
+    def __init__(self, name, allocations=None, out_dir=None):
+        self.name = name
+        self.allocations = PROFILE_ALLOCATIONS if allocations is None else allocations
+        self.out_dir = out_dir or PROFILE_DIR
+        self.spans = []
+        self.files = {}
+
+    def __enter__(self):
+        global _tracing_sessions
+        if self.allocations:
+            with _tracing_lock:
+                if _tracing_sessions == 0 and not tracemalloc.is_tracing():
+                    tracemalloc.start(25)
+                _tracing_sessions += 1
+            tracemalloc.reset_peak()
+            self._snapshot = tracemalloc.take_snapshot()
+        self.profiler = SamplingProfiler().start()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        global _tracing_sessions
+        self.wall_ms = (time.perf_counter() - self._start) * 1000
+        self.profiler.stop()
+        allocation_stats = None
+        self.peak_kb = None
+        if self.allocations:
+            self.peak_kb = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+            allocation_stats = self._allocation_diff(tracemalloc.take_snapshot())
+            with _tracing_lock:
+                _tracing_sessions -= 1
+                if _tracing_sessions == 0:
+                    tracemalloc.stop()
+        self._write(allocation_stats)
+        record_event(
+            "profile",
+            function=self.name,
+            wall_ms=round(self.wall_ms, 1),
+            samples=self.profiler.samples,
+            peak_kb=self.peak_kb,
+            spans=self.spans,
+            files=self.files
+        )
+        return False
+
+    def _allocation_diff(self, snapshot, limit=25):
+        ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+        stats = snapshot.filter_traces(ignore).compare_to(self._snapshot.filter_traces(ignore), "lineno")
+        return stats[:limit]
+
+    def _write(self, allocation_stats):
+        os.makedirs(self.out_dir, exist_ok=True)
+        base = os.path.join(self.out_dir, f"{self.name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(_file_counter)}")
+
+        self.files["flamegraph"] = f"{base}.folded"
+        with open(self.files["flamegraph"], "w") as f:
+            f.write(self.profiler.folded() + "\n")
+
+        if allocation_stats is not None:
+            self.files["allocations"] = f"{base}.alloc.txt"
+            with open(self.files["allocations"], "w") as f:
+                f.write(f"# {self.name}: net allocation changes over {self.wall_ms:,.0f} ms, "
+                        f"peak traced {self.peak_kb:,.1f} KiB\n")
+                for stat in allocation_stats:
+                    f.write(f"{stat}\n")
+
+
+def profiled(name=None):
+    """Decorator: profile the call when profiling is on for this process or request.
+
+    Only the outermost decorated call starts a session; nested ones (e.g.
+    semantic_search inside rag_query inside coordinate_response) are recorded
+    as timed spans of it.
+    """
+    def decorator(func):
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not (PROFILE_ENABLED or _requested.get()):
+                return func(*args, **kwargs)
+
+            session = _session.get()
+            if session is not None:
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    session.spans.append({"name": label, "ms": round((time.perf_counter() - start) * 1000, 2)})
+
+            session = ProfileSession(label)
+            token = _session.set(session)
+            try:
+                with session:
+                    return func(*args, **kwargs)
+            finally:
+                _session.reset(token)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def profile_request(enabled=True):
+    """Profile decorated calls made inside this block (this thread/context only)"""
+    token = _requested.set(enabled)
+    try:
+        yield
+    finally:
+        _requested.reset(token)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Profile one agent turn and write flamegraph/allocation files")
+    parser.add_argument("question", nargs="?", default="Can I afford a $450,000 home with $90,000 income?")
+    parser.add_argument("--agent", choices=["multi", "enhanced", "tools"], default="multi")
+    parser.add_argument("--out", default=PROFILE_DIR, help="directory for .folded and .alloc.txt files")
+    args = parser.parse_args()
+
+    # The agents' decorators live in the imported module, not in this __main__ copy
+    import metrics
+    import profiling
+    profiling.PROFILE_DIR = args.out
+
+    if args.agent == "multi":
+        from multi_agent_system import CustomerAgent
+        turn = CustomerAgent().coordinate_response
+    elif args.agent == "enhanced":
+        from enhanced_agent import RealEstateAgentWithMemory
+        turn = RealEstateAgentWithMemory().chat
+    else:
+        from real_estate_agent import run_agent
+        turn = run_agent
+
+    with profiling.profile_request():
+        answer = turn(args.question)
+
+    profile = [e for e in metrics.recent_events if e["event"] == "profile"][-1]
+    print(f"🤖 {answer}\n")
+    print(f"🔥 Profiled {profile['function']}: {profile['wall_ms']:,.0f} ms, {profile['samples']} samples")
+    for span in profile["spans"]:
+        print(f"   {span['name']}: {span['ms']:,.1f} ms")
+    for kind, path in profile["files"].items():
+        print(f"📄 {kind}: {path}")
@@ -1,15 +1,15 @@
-import os
 from dotenv import load_dotenv
-from openai import OpenAI
+from llm_client import get_client
 import json
 import math
+import numpy as np
+from comps import get_comps_engine
+from portfolio_simulator import simulate_portfolio
+from profiling import profiled
 
 load_dotenv()
 
-client = OpenAI(
-    api_key=os.getenv("DEEPSEEK_API_KEY"),
-    base_url="https://api.deepseek.com/v1"
-)
+client = get_client()
 
 # Tool Functions
 def calculate_mortgage(price, down_payment_percent, interest_rate, years):
@@ -33,6 +33,26 @@ def calculate_mortgage(price, down_payment_percent, interest_rate, years):
     except Exception as e:
         return {"error": f"Calculation error: {str(e)}"}
 
+def calculate_mortgage_batch(prices, down_payment_percents, interest_rates, years):
+    """Calculate monthly mortgage payments for many loans at once (vectorized calculate_mortgage)"""
+    prices = np.asarray(prices, dtype=np.float64)
+    loan_amount = prices - prices * np.asarray(down_payment_percents, dtype=np.float64) / 100
+    monthly_rate = np.asarray(interest_rates, dtype=np.float64) / 100 / 12
+    num_payments = np.asarray(years, dtype=np.float64) * 12
+    
+    # Zero-rate loans fall back to straight division, same as the scalar version
+    growth = (1 + monthly_rate)**num_payments
+    safe_rate = np.where(monthly_rate == 0, 1.0, monthly_rate)
+    amortized = loan_amount * (safe_rate * growth) / np.where(monthly_rate == 0, 1.0, growth - 1)
+    monthly_payment = np.where(monthly_rate == 0, loan_amount / num_payments, amortized)
+    
+    return {
+        "monthly_payment": np.round(monthly_payment, 2),
+        "total_paid": np.round(monthly_payment * num_payments, 2),
+        "total_interest": np.round((monthly_payment * num_payments) - loan_amount, 2),
+        "loan_amount": np.round(loan_amount, 2)
+    }
+
 def property_comparison(prop1_price, prop2_price, prop1_sqft, prop2_sqft):
     """Compare two properties by price per square foot"""
     try:
@@ -73,6 +93,23 @@ def affordability_check(annual_income, monthly_debt, home_price):
     except Exception as e:
         return {"error": f"Affordability error: {str(e)}"}
 
+def find_comparable_sales(beds, baths, sqft, year_built, zip_code=None, lat=None, lon=None, k=6):
+    """Find the most similar sold homes and estimate the subject's value from them"""
+    try:
+        return get_comps_engine().find_comps(beds, baths, sqft, year_built, lat=lat, lon=lon,
+                                             zip_code=zip_code, k=int(k))
+    except FileNotFoundError:
+        return {"error": "Comparable sales data is not available (set COMPS_DATA_PATH)"}
+    except Exception as e:
+        return {"error": f"Comps error: {str(e)}"}
+
+def simulate_rental_portfolio(properties, n_paths=10000, years=10, seed=42):
+    """Monte Carlo IRR, cash-on-cash, cap rate and NPV distributions for rental properties"""
+    try:
+        return simulate_portfolio(properties, n_paths=min(int(n_paths), 50000), seed=int(seed), years=int(years))
+    except Exception as e:
+        return {"error": f"Simulation error: {str(e)}"}
+
 # Tool definitions for the AI
 tools = [
     {
@@ -124,9 +161,64 @@ tools = [
                 "required": ["annual_income", "monthly_debt", "home_price"]
             }
         }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "find_comparable_sales",
+            "description": "Find comparable sold properties (comps) near a subject property and estimate its market value",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "beds": {"type": "number", "description": "Bedrooms in the subject property"},
+                    "baths": {"type": "number", "description": "Bathrooms in the subject property"},
+                    "sqft": {"type": "number", "description": "Square footage of the subject property"},
+                    "year_built": {"type": "number", "description": "Year the subject property was built"},
+                    "zip_code": {"type": "string", "description": "Zip code, used when the exact location is unknown"},
+                    "lat": {"type": "number", "description": "Latitude of the subject property, if known"},
+                    "lon": {"type": "number", "description": "Longitude of the subject property, if known"},
+                    "k": {"type": "number", "description": "Number of comps to return (default 6)"}
+                },
+                "required": ["beds", "baths", "sqft", "year_built"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "simulate_rental_portfolio",
+            "description": "Simulate thousands of market scenarios for one or more rental properties and return percentile ranges for IRR, cash-on-cash return, cap rate and NPV",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "properties": {
+                        "type": "array",
+                        "description": "Rental properties in the portfolio",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "name": {"type": "string", "description": "Label for the property"},
+                                "price": {"type": "number", "description": "Purchase price in dollars"},
+                                "monthly_rent": {"type": "number", "description": "Expected monthly rent in dollars"},
+                                "down_payment_percent": {"type": "number", "description": "Down payment as percentage (default 20)"},
+                                "interest_rate": {"type": "number", "description": "Fixed mortgage rate as percentage (default 6.5)"},
+                                "adjustable_rate": {"type": "boolean", "description": "True if the loan rate resets yearly with the market"},
+                                "expense_ratio": {"type": "number", "description": "Operating expenses as a share of rent (default 0.35)"}
+                            },
+                            "required": ["price", "monthly_rent"]
+                        }
+                    },
+                    "years": {"type": "number", "description": "Holding period in years (default 10)"},
+                    "n_paths": {"type": "number", "description": "Number of simulated scenarios (default 10000)"},
+                    "seed": {"type": "number", "description": "Random seed for reproducible results"}
+                },
+                "required": ["properties"]
+            }
+        }
     }
 ]
 
+@profiled()
 def run_agent(user_message):
     """Run the AI agent with tool calling capabilities"""
     
@@ -137,6 +229,8 @@ def run_agent(user_message):
 - Mortgage calculations
 - Property comparisons  
 - Affordability assessments
+- Comparable sales and value estimates
+- Rental portfolio simulations (IRR, cash-on-cash, cap rate, NPV ranges)
 - General real estate advice
 
 When users ask about calculations, use the provided tools. Always explain your reasoning and provide helpful context from your real estate expertise."""
@@ -169,6 +263,10 @@ When users ask about calculations, use the provided tools. Always explain your r
                 result = property_comparison(**function_args)
             elif function_name == "affordability_check":
                 result = affordability_check(**function_args)
+            elif function_name == "find_comparable_sales":
+                result = find_comparable_sales(**function_args)
+            elif function_name == "simulate_rental_portfolio":
+                result = simulate_rental_portfolio(**function_args)
             else:
                 result = {"error": "Unknown function"}
             
@@ -0,0 +1,115 @@
+import os
+import time
+import numpy as np
+from llm_client import estimate_tokens
+
+DEFAULT_CROSS_ENCODER = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+
+class CrossEncoderReranker:
+    """Re-scores dense candidates with a local cross-encoder under a latency budget.
+
+    Candidates are scored in dense order, one batch at a time. Each batch is
+    sized from a running estimate of the time per pair so that it fits in what
+    is left of `latency_budget_ms`; when not even one pair fits, scoring stops.
+    Whatever was not scored keeps its dense position behind the scored ones.
+    When the dense top-1 already beats the runner-up by `decisive_margin`
+    (cosine), scoring is skipped entirely. Loading and warming up the model
+    happen outside the budget and are reported as `load_ms`.
+    """
+
+    def __init__(self, model_name=DEFAULT_CROSS_ENCODER, batch_size=8, latency_budget_ms=150.0,
+                 decisive_margin=0.15, token_budget=600, threads=None):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.latency_budget_ms = latency_budget_ms
+        self.decisive_margin = decisive_margin
+        self.token_budget = token_budget
+        self.threads = threads
+        self._model = None
+        self._per_pair = None
+
+    def _load(self):
+        import torch
+        from sentence_transformers import CrossEncoder
+
+        if self.threads:
+            torch.set_num_threads(self.threads)
+        return CrossEncoder(self.model_name, max_length=256)
+
+    def warm_up(self):
+        """Load the model and time one pair, so the first query's budget isn't spent on either"""
+        if self._model is None:
+            self._model = self._load()
+            self._model.predict([("warm up", "warm up")])
+            pair_start = time.perf_counter()
+            self._model.predict([("warm up", "warm up")])
+            self._per_pair = max(time.perf_counter() - pair_start, 1e-6)
+
+    def rerank(self, query, documents, similarities, keep=2):
+        """Return (documents to use as context, info about what the stage did)"""
+        info = {"candidates": len(documents), "scored": 0, "skipped": None}
+        if self._model is None and len(documents) >= 2 and similarities[0] - similarities[1] < self.decisive_margin:
+            load_start = time.perf_counter()
+            self.warm_up()
+            info["load_ms"] = round((time.perf_counter() - load_start) * 1000, 2)
+        start = time.perf_counter()
+
+        if len(documents) < 2:
+            info["skipped"] = "too_few_candidates"
+            order = list(range(len(documents)))
+        elif similarities[0] - similarities[1] >= self.decisive_margin:
+            info["skipped"] = "decisive_dense_score"
+            order = list(range(len(documents)))
+        else:
+            order = self._score_within_budget(query, documents, start, info)
+
+        info["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        return self._fit_token_budget([documents[i] for i in order], keep), info
+
+    def _score_within_budget(self, query, documents, start, info):
+        budget = self.latency_budget_ms / 1000
+        scores = []
+
+        while len(scores) < len(documents):
+            remaining = budget - (time.perf_counter() - start)
+            size = min(self.batch_size, len(documents) - len(scores), int(remaining / self._per_pair))
+            if size < 1:
+                info["skipped"] = "latency_budget"
+                break
+
+            batch = documents[len(scores):len(scores) + size]
+            batch_begin = time.perf_counter()
+            scores.extend(self._model.predict([(query, doc) for doc in batch], batch_size=self.batch_size))
+            # Moving average, leaning on the slower of old and new so one fast batch can't overcommit
+            measured = (time.perf_counter() - batch_begin) / size
+            self._per_pair = max(measured, 0.7 * self._per_pair + 0.3 * measured)
+
+        info["scored"] = len(scores)
+        scored_order = np.argsort(-np.asarray(scores), kind="stable").tolist()
+        return scored_order + list(range(len(scores), len(documents)))
+
+    def _fit_token_budget(self, ordered_docs, keep):
+        """Take up to `keep` documents in rank order, skipping any that would overflow the token budget"""
+        selected = []
+        used = 0
+        for doc in ordered_docs:
+            if len(selected) == keep:
+                break
+            tokens = estimate_tokens(doc)
+            if selected and used + tokens > self.token_budget:
+                continue
+            selected.append(doc)
+            used += tokens
+        return selected
+
+
+def get_reranker():
+    """Build the reranker configured by the RERANK_* environment variables"""
+    return CrossEncoderReranker(
+        model_name=os.getenv("RERANK_MODEL", DEFAULT_CROSS_ENCODER),
+        batch_size=int(os.getenv("RERANK_BATCH_SIZE", "8")),
+        latency_budget_ms=float(os.getenv("RERANK_LATENCY_BUDGET_MS", "150")),
+        decisive_margin=float(os.getenv("RERANK_DECISIVE_MARGIN", "0.15")),
+        token_budget=int(os.getenv("RERANK_TOKEN_BUDGET", "600")),
+    )
@@ -0,0 +1,134 @@
+import json
+import re
+
+ROUTES = ["research", "financial", "search"]
+
+# Forced function call the coordinator answers with; the enum keeps the model on known routes
+ROUTING_TOOL = {
+    "type": "function",
+    "function": {
+        "name": "route_request",
+        "description": "Choose which specialist agents should handle the user's message",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "needs": {
+                    "type": "array",
+                    "items": {"type": "string", "enum": ROUTES},
+                    "minItems": 1,
+                    "uniqueItems": True,
+                    "description": "research: market trends, investment, neighborhoods; "
+                                   "financial: affordability, mortgages, budgets; "
+                                   "search: specific properties or general real estate questions"
+                },
+                "priority": {"type": "string", "enum": ROUTES}
+            },
+            "required": ["needs", "priority"],
+            "additionalProperties": False
+        }
+    }
+}
+ROUTING_TOOL_CHOICE = {"type": "function", "function": {"name": "route_request"}}
+
+CODE_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL | re.IGNORECASE)
+
+# Keyword routing for when the model's answer can't be repaired
+ROUTE_KEYWORDS = {
+    "financial": re.compile(r"\b(afford\w*|mortgage|income|salary|budget|payments?|down payment|loan|"
+                            r"interest|rates?|debt|pre-?approv\w*)\b|\$\d", re.IGNORECASE),
+    "research": re.compile(r"\b(markets?|trends?|invest\w*|neighbou?rhoods?|apprecia\w*|forecast|"
+                           r"rental yield|growth|compare)\b", re.IGNORECASE),
+    "search": re.compile(r"\b(propert(?:y|ies)|listings?|homes?|houses?|condos?|beds?|bedrooms?|baths?|"
+                         r"pool|yard|schools?|which|find|show)\b", re.IGNORECASE),
+}
+
+
+def extract_json_object(text):
+    """First balanced {...} in text, after stripping code fences; None if there isn't one"""
+    if not text:
+        return None
+    fenced = CODE_FENCE_RE.search(text)
+    if fenced:
+        text = fenced.group(1)
+
+    start = text.find("{")
+    while start != -1:
+        depth = 0
+        in_string = escaped = False
+        for i in range(start, len(text)):
+            ch = text[i]
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif ch == "\\":
+                    escaped = True
+                elif ch == '"':
+                    in_string = False
+            elif ch == '"':
+                in_string = True
+            elif ch == "{":
+                depth += 1
+            elif ch == "}":
+                depth -= 1
+                if depth == 0:
+                    try:
+                        return json.loads(text[start:i + 1])
+                    except json.JSONDecodeError:
+                        break
+        start = text.find("{", start + 1)
+    return None
+
+
+def validate_routing(data):
+    """Normalize a routing decision to {"needs": [...], "priority": ...}; None if it has no known route"""
+    if not isinstance(data, dict):
+        return None
+    needs = data.get("needs")
+    if isinstance(needs, str):
+        needs = [needs]
+    if not isinstance(needs, list):
+        return None
+    needs = [n.strip().lower() for n in needs if isinstance(n, str) and n.strip().lower() in ROUTES]
+    needs = list(dict.fromkeys(needs))
+    if not needs:
+        return None
+    priority = data.get("priority")
+    priority = priority.strip().lower() if isinstance(priority, str) else None
+    return {"needs": needs, "priority": priority if priority in needs else needs[0]}
+
+
+def keyword_routing(user_message):
+    """Local routing from keywords; always returns at least `search`"""
+    needs = [route for route in ROUTES if ROUTE_KEYWORDS[route].search(user_message)]
+    needs = needs or ["search"]
+    return {"needs": needs, "priority": needs[0]}
+
+
+def parse_routing(message, user_message):
+    """Routing decision from a coordinator reply, plus how it was obtained.
+
+    Sources, best first: "tool_call" (schema-constrained arguments), "json"
+    (valid JSON content), "repaired" (JSON dug out of prose or code fences),
+    "keyword_fallback" (nothing usable came back).
+    """
+    for call in getattr(message, "tool_calls", None) or []:
+        if call.function.name == "route_request":
+            try:
+                decision = validate_routing(json.loads(call.function.arguments))
+            except (json.JSONDecodeError, TypeError):
+                decision = validate_routing(extract_json_object(call.function.arguments))
+            if decision:
+                return decision, "tool_call"
+
+    content = getattr(message, "content", None) or ""
+    try:
+        decision = validate_routing(json.loads(content))
+        if decision:
+            return decision, "json"
+    except (json.JSONDecodeError, TypeError):
+        pass
+
+    decision = validate_routing(extract_json_object(content))
+    if decision:
+        return decision, "repaired"
+    return keyword_routing(user_message), "keyword_fallback"
@@ -1,14 +1,12 @@
 import streamlit as st
-from advanced_rag import rag_query, setup_vector_database
+from advanced_rag import rag_query, ensure_vector_database
 import os
 
 # Set page config
 st.set_page_config(page_title="Real Estate AI Assistant", page_icon="🏠")
 
-# Initialize the database once
-if 'db_initialized' not in st.session_state:
-    setup_vector_database()
-    st.session_state.db_initialized = True
+# Initialize the database once per server process (not per session)
+ensure_vector_database()
 
 # Title
 st.title("🏠 Real Estate AI Assistant")
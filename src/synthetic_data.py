@@ -0,0 +1,291 @@
+import argparse
+import gzip
+import json
+import os
+import random
+import zlib
+
+# Default market: Austin zip codes with approximate centroids and price per sqft
+AUSTIN_ZIPS = {
+    "78701": {"name": "Downtown", "state": "TX", "lat": 30.2711, "lon": -97.7437, "price_per_sqft": 520},
+    "78702": {"name": "East Austin", "state": "TX", "lat": 30.2636, "lon": -97.7166, "price_per_sqft": 410},
+    "78703": {"name": "Clarksville", "state": "TX", "lat": 30.2900, "lon": -97.7680, "price_per_sqft": 560},
+    "78704": {"name": "South Austin", "state": "TX", "lat": 30.2430, "lon": -97.7650, "price_per_sqft": 440},
+    "78705": {"name": "University", "state": "TX", "lat": 30.2896, "lon": -97.7396, "price_per_sqft": 430},
+    "78721": {"name": "Govalle", "state": "TX", "lat": 30.2720, "lon": -97.6860, "price_per_sqft": 330},
+    "78723": {"name": "Windsor Park", "state": "TX", "lat": 30.3040, "lon": -97.6850, "price_per_sqft": 340},
+    "78731": {"name": "Northwest Hills", "state": "TX", "lat": 30.3470, "lon": -97.7680, "price_per_sqft": 450},
+    "78745": {"name": "Cherry Creek", "state": "TX", "lat": 30.2070, "lon": -97.7960, "price_per_sqft": 320},
+    "78757": {"name": "Crestview", "state": "TX", "lat": 30.3510, "lon": -97.7330, "price_per_sqft": 380},
+}
+
+# Synthetic zips take the state of their first digit's range (0xxxx is New England,
+# 9xxxx the West Coast, ...), with a lat/lon box inside it: (state, lat range, lon range)
+ZIP_PREFIX_STATES = {
+    "0": ("MA", (41.2, 42.9), (-73.5, -69.9)),
+    "1": ("NY", (40.5, 45.0), (-79.8, -71.9)),
+    "2": ("VA", (36.5, 39.5), (-83.7, -75.2)),
+    "3": ("FL", (24.5, 31.0), (-87.6, -80.0)),
+    "4": ("OH", (38.4, 42.0), (-84.8, -80.5)),
+    "5": ("MN", (43.5, 49.4), (-97.2, -89.5)),
+    "6": ("IL", (37.0, 42.5), (-91.5, -87.5)),
+    "7": ("TX", (25.8, 36.5), (-106.6, -93.5)),
+    "8": ("CO", (37.0, 41.0), (-109.0, -102.0)),
+    "9": ("CA", (32.5, 42.0), (-124.4, -114.1)),
+}
+
+STREETS = ["Main St", "Oak Ave", "Elm St", "Cedar Ln", "Maple Dr", "Pecan St", "Lamar Blvd",
+           "Congress Ave", "Barton Springs Rd", "Riverside Dr", "Guadalupe St", "Burnet Rd",
+           "Manor Rd", "Koenig Ln", "Airport Blvd", "Slaughter Ln", "Parmer Ln", "Duval St"]
+PROPERTY_TYPES = ["single-family home", "townhouse", "condo", "bungalow", "ranch-style home"]
+FEATURES = ["swimming pool", "two-car garage", "hardwood floors", "granite countertops",
+            "fenced backyard", "solar panels", "home office", "renovated kitchen",
+            "covered patio", "walk-in closets", "open floor plan", "mature oak trees"]
+QUARTERS = ["Q1", "Q2", "Q3", "Q4"]
+
+
+def zip_profiles(zip_codes=None):
+    """Market profile per zip code; unknown zips get a deterministic synthetic profile"""
+    if not zip_codes:
+        return dict(AUSTIN_ZIPS)
+
+    profiles = {}
+    for code in zip_codes:
+        if code in AUSTIN_ZIPS:
+            profiles[code] = AUSTIN_ZIPS[code]
+            continue
+        rng = random.Random(zlib.crc32(code.encode()))
+        state, lat_range, lon_range = ZIP_PREFIX_STATES.get(code[:1], ZIP_PREFIX_STATES["7"])
+        profiles[code] = {
+            "name": f"Area {code}",
+            "state": state,
+            "lat": round(rng.uniform(*lat_range), 4),
+            "lon": round(rng.uniform(*lon_range), 4),
+            "price_per_sqft": rng.randint(150, 650),
+        }
+    return profiles
+
+
+def _record_rng(seed, kind, index):
+    """Independent RNG per record so any slice of the stream can be regenerated on its own"""
+    return random.Random(f"{seed}:{kind}:{index}")
+
+
+def make_listing(index, profiles, seed=42):
+    """Build listing number `index` with structured fields and its document text"""
+    rng = _record_rng(seed, "listing", index)
+    zip_codes = sorted(profiles)
+    zip_code = rng.choice(zip_codes)
+    profile = profiles[zip_code]
+
+    beds = rng.choices([1, 2, 3, 4, 5, 6], weights=[8, 22, 35, 23, 9, 3])[0]
+    baths = max(1.0, min(beds + rng.choice([-1, -0.5, 0, 0, 0.5, 1]), 5.0))
+    sqft = int(max(450, rng.gauss(550 + beds * 420, 260)))
+    year_built = rng.randint(1935, 2024)
+    lot_acres = round(rng.uniform(0.08, 0.6), 2)
+    property_type = rng.choice(PROPERTY_TYPES)
+    features = rng.sample(FEATURES, rng.randint(1, 3))
+
+    # Newer homes and bigger lots carry a premium on top of the zip's base price
+    price_per_sqft = profile["price_per_sqft"] * rng.uniform(0.8, 1.2)
+    price_per_sqft *= 1 + (year_built - 1980) * 0.003 + (lot_acres - 0.25) * 0.2
+    price = int(round(sqft * price_per_sqft, -3))
+
+    status = "sold" if rng.random() < 0.6 else "active"
+    listing = {
+        "listing_id": f"L{index:09d}",
+        "address": f"{rng.randint(100, 9999)} {rng.choice(STREETS)}",
+        "city": "Austin" if zip_code in AUSTIN_ZIPS else profile["name"],
+        "zip": zip_code,
+        "lat": round(profile["lat"] + rng.gauss(0, 0.015), 6),
+        "lon": round(profile["lon"] + rng.gauss(0, 0.015), 6),
+        "property_type": property_type,
+        "beds": beds,
+        "baths": baths,
+        "sqft": sqft,
+        "year_built": year_built,
+        "lot_acres": lot_acres,
+        "features": features,
+        "list_price": price,
+        "status": status,
+        "sold_price": int(round(price * rng.uniform(0.93, 1.06), -3)) if status == "sold" else None,
+        "sold_date": f"{rng.randint(2019, 2024)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}" if status == "sold" else None,
+    }
+
+    listing["document"] = listing_document(listing, profiles)
+    return listing
+
+
+def listing_document(listing, profiles):
+    """Document text for a listing's current fields"""
+    sold = listing["status"] == "sold"
+    return (
+        f"Property listing: {listing['address']}, {listing['city']} {profiles[listing['zip']]['state']} {listing['zip']}. "
+        f"This {listing['beds']}-bedroom, {listing['baths']:g}-bathroom {listing['property_type']} "
+        f"has {listing['sqft']:,} sqft on {listing['lot_acres']} acres in {profiles[listing['zip']]['name']}. "
+        f"Built in {listing['year_built']}, it features {', '.join(listing['features'])}. "
+        f"Listed at ${listing['list_price']:,}."
+        + (f" Sold for ${listing['sold_price']:,} on {listing['sold_date']}." if sold else "")
+    )
+
+
+def generate_listings(n, zip_codes=None, seed=42, start=0):
+    """Stream `n` listings (from index `start`) without holding them in memory"""
+    profiles = zip_profiles(zip_codes)
+    for index in range(start, start + n):
+        yield make_listing(index, profiles, seed)
+
+
+def listing_change_events(listings, n_events, zip_codes=None, seed=42, delete_share=0.2):
+    """Stream a live feed of price changes and off-market deletes for active `listings`.
+
+    Events look like {"op": "upsert", "listing": {..., "version": n}} or
+    {"op": "delete", "listing_id": ..., "version": n}; versions count up per
+    listing from 1 (the original listing).
+    """
+    profiles = zip_profiles(zip_codes)
+    rng = _record_rng(seed, "changes", len(listings))
+    active = {listing["listing_id"]: dict(listing, version=listing.get("version", 1))
+              for listing in listings if listing["status"] == "active"}
+    ids = list(active)
+
+    for _ in range(n_events):
+        if not ids:
+            return
+        position = rng.randrange(len(ids))
+        listing = active[ids[position]]
+        version = listing["version"] + 1
+
+        if rng.random() < delete_share:
+            ids[position] = ids[-1]
+            ids.pop()
+            del active[listing["listing_id"]]
+            yield {"op": "delete", "listing_id": listing["listing_id"], "version": version}
+            continue
+
+        listing["list_price"] = int(round(listing["list_price"] * rng.uniform(0.92, 1.04), -3))
+        listing["version"] = version
+        listing["document"] = listing_document(listing, profiles)
+        yield {"op": "upsert", "listing": dict(listing)}
+
+
+def generate_market_reports(zip_codes=None, years=(2022, 2023, 2024), seed=42):
+    """One market report per zip code and quarter"""
+    profiles = zip_profiles(zip_codes)
+    for zip_code in sorted(profiles):
+        profile = profiles[zip_code]
+        median = profile["price_per_sqft"] * 1900
+        for year in years:
+            for quarter in QUARTERS:
+                rng = _record_rng(seed, f"report:{zip_code}", f"{year}{quarter}")
+                yoy = round(rng.uniform(-4.0, 12.0), 1)
+                median = int(round(median * (1 + yoy / 400), -3))
+                days_on_market = rng.randint(12, 75)
+                inventory = round(rng.uniform(1.2, 5.5), 1)
+                report = {
+                    "report_id": f"R{zip_code}{year}{quarter}",
+                    "zip": zip_code,
+                    "period": f"{quarter} {year}",
+                    "median_price": median,
+                    "yoy_change_percent": yoy,
+                    "days_on_market": days_on_market,
+                    "months_of_inventory": inventory,
+                }
+                report["document"] = (
+                    f"{profile['name']} ({zip_code}) Real Estate Market Report {quarter} {year}: "
+                    f"median home price reached ${median:,}, a {yoy:+.1f}% change year-over-year. "
+                    f"Homes sold in an average of {days_on_market} days with {inventory} months of inventory."
+                )
+                yield report
+
+
+def listing_queries(listing, seed=42):
+    """Labelled question/answer pairs whose relevant document is `listing`"""
+    rng = _record_rng(seed, "query", listing["listing_id"])
+    where = f"{listing['address']} in {listing['zip']}"
+    feature = rng.choice(listing["features"])
+    return [
+        {"query": f"How much is the home at {where} listed for?",
+         "answer": f"${listing['list_price']:,}", "field": "list_price", "doc_id": listing["listing_id"]},
+        {"query": f"How many bedrooms does {where} have?",
+         "answer": str(listing["beds"]), "field": "beds", "doc_id": listing["listing_id"]},
+        {"query": f"{listing['beds']} bedroom {listing['property_type']} with {feature} at {listing['address']}",
+         "answer": listing["address"], "field": "address", "doc_id": listing["listing_id"]},
+    ]
+
+
+def report_queries(report):
+    """Labelled question/answer pairs whose relevant document is `report`"""
+    return [
+        {"query": f"What was the median home price in {report['zip']} in {report['period']}?",
+         "answer": f"${report['median_price']:,}", "field": "median_price", "doc_id": report["report_id"]},
+    ]
+
+
+def generate_queries(listings, reports=(), every=100, seed=42):
+    """Stream labelled queries for every `every`-th listing and all reports"""
+    for i, listing in enumerate(listings):
+        if i % every == 0:
+            yield from listing_queries(listing, seed)
+    for report in reports:
+        yield from report_queries(report)
+
+
+def write_jsonl_gz(records, path):
+    """Stream records to gzip-compressed JSON lines; returns the number written"""
+    count = 0
+    with gzip.open(path, "wt", encoding="utf-8", compresslevel=6) as f:
+        for record in records:
+            f.write(json.dumps(record, separators=(",", ":")))
+            f.write("\n")
+            count += 1
+    return count
+
+
+def read_jsonl_gz(path):
+    """Stream records back from a file written by write_jsonl_gz"""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def generate_dataset(out_dir, n_listings, zip_codes=None, seed=42, query_every=100):
+    """Write listings, market reports and labelled queries to `out_dir`"""
+    os.makedirs(out_dir, exist_ok=True)
+    sampled = []
+
+    def listings_with_sample():
+        # Keep only the listings that get queries, so the stream stays constant-memory
+        for i, listing in enumerate(generate_listings(n_listings, zip_codes, seed)):
+            if i % query_every == 0:
+                sampled.append(listing)
+            yield listing
+
+    counts = {
+        "listings": write_jsonl_gz(listings_with_sample(), os.path.join(out_dir, "listings.jsonl.gz")),
+        "reports": write_jsonl_gz(generate_market_reports(zip_codes, seed=seed),
+                                  os.path.join(out_dir, "market_reports.jsonl.gz")),
+    }
+    reports = generate_market_reports(zip_codes, seed=seed)
+    counts["queries"] = write_jsonl_gz(generate_queries(sampled, reports, every=1, seed=seed),
+                                       os.path.join(out_dir, "queries.jsonl.gz"))
+
+    with open(os.path.join(out_dir, "manifest.json"), "w") as f:
+        json.dump({"seed": seed, "zip_codes": sorted(zip_profiles(zip_codes)),
+                   "query_every": query_every, "counts": counts}, f, indent=2)
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic real estate corpus")
+    parser.add_argument("--listings", type=int, default=100000, help="number of listings")
+    parser.add_argument("--zips", default="", help="comma-separated zip codes (default: Austin)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--query-every", type=int, default=100, help="label every Nth listing with queries")
+    parser.add_argument("--out", default="data/synthetic", help="output directory")
+    args = parser.parse_args()
+
+    zip_codes = [z.strip() for z in args.zips.split(",") if z.strip()] or None
+    counts = generate_dataset(args.out, args.listings, zip_codes, args.seed, args.query_every)
+    print(f"✅ Wrote {counts['listings']:,} listings, {counts['reports']:,} market reports "
+          f"and {counts['queries']:,} labelled queries to {args.out}")
@@ -1,13 +1,22 @@
 import streamlit as st
-import os
+import time
 from dotenv import load_dotenv
+from advanced_rag import ensure_vector_database, embedding_model
+from llm_client import get_client
 from multi_agent_system import CustomerAgent
 from enhanced_agent import RealEstateAgentWithMemory
-import json
-import time
+from real_estate_agent import calculate_mortgage
+from metrics import record_event
+from profiling import profile_request
+
+# Time the whole script run; Streamlit reruns it on every interaction
+render_start = time.perf_counter()
 
 load_dotenv()
 
+# Chat messages shown before "Load earlier messages"
+HISTORY_WINDOW = 20
+
 # Page config
 st.set_page_config(
     page_title="AI Real Estate Assistant",
@@ -40,7 +49,16 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Initialize agents in session state
+@st.cache_resource(show_spinner="Loading models and knowledge base...")
+def load_shared_resources():
+    """Model, vector store and LLM client, created once per server process and shared by all sessions"""
+    ensure_vector_database()
+    embedding_model.encode("warm up")
+    return {"embedding_model": embedding_model, "client": get_client()}
+
+load_shared_resources()
+
+# Per-session state: agents are cheap now that the shared resources exist
 if 'customer_agent' not in st.session_state:
     st.session_state.customer_agent = CustomerAgent()
 
@@ -50,6 +68,12 @@ if 'enhanced_agent' not in st.session_state:
 if 'messages' not in st.session_state:
     st.session_state.messages = []
 
+if 'history_window' not in st.session_state:
+    st.session_state.history_window = HISTORY_WINDOW
+
+if 'render_times' not in st.session_state:
+    st.session_state.render_times = []
+
 if 'agent_mode' not in st.session_state:
     st.session_state.agent_mode = "Multi-Agent System"
 
@@ -97,10 +121,18 @@ with st.sidebar:
     st.markdown("### 📊 System Stats")
     st.markdown(f"**Messages**: {len(st.session_state.messages)}")
     st.markdown(f"**Agent Mode**: {agent_mode}")
+    # Filled in at the end of the run, once the render time is known
+    render_stats = st.empty()
+    # One-shot: a profiled turn unticks the box (a widget's state can only change before it is drawn)
+    if st.session_state.pop("profile_turn_done", False):
+        st.session_state.profile_turn = False
+    profile_turn = st.checkbox("🔥 Profile next turn", key="profile_turn",
+                               help="Writes a flamegraph and allocation snapshot to PROFILE_DIR for one turn")
     
     # Clear conversation button
     if st.button("🔄 Clear Conversation"):
         st.session_state.messages = []
+        st.session_state.history_window = HISTORY_WINDOW
         st.session_state.enhanced_agent = RealEstateAgentWithMemory()
         st.rerun()
 
@@ -110,13 +142,22 @@ col1, col2 = st.columns([2, 1])
 with col1:
     st.markdown("## 💬 Chat with Your AI Assistant")
     
-    # Display chat messages
-    for message in st.session_state.messages:
+    # Display only the most recent messages; older ones load on request
+    messages = st.session_state.messages
+    hidden = max(0, len(messages) - st.session_state.history_window)
+    if hidden:
+        if st.button(f"⬆️ Load earlier messages ({hidden} hidden)"):
+            st.session_state.history_window += HISTORY_WINDOW
+            st.rerun()
+    
+    for message in messages[hidden:]:
         with st.chat_message(message["role"]):
             st.markdown(message["content"])
     
-    # Chat input
-    if prompt := st.chat_input("Ask about real estate, mortgages, or property analysis..."):
+    # Chat input (or a sample question clicked on the previous run)
+    prompt = st.chat_input("Ask about real estate, mortgages, or property analysis...")
+    prompt = prompt or st.session_state.pop("pending_prompt", None)
+    if prompt:
         # Add user message
         st.session_state.messages.append({"role": "user", "content": prompt})
         with st.chat_message("user"):
@@ -127,11 +168,13 @@ with col1:
             with st.spinner("AI agents analyzing your request..."):
                 
                 if agent_mode == "Multi-Agent System":
-                    response = st.session_state.customer_agent.coordinate_response(prompt)
+                    with profile_request(profile_turn):
+                        response = st.session_state.customer_agent.coordinate_response(prompt)
                     st.markdown("🤖 **Multi-Agent Analysis:**")
                     
                 elif agent_mode == "Enhanced Agent":
-                    response = st.session_state.enhanced_agent.chat(prompt)
+                    with profile_request(profile_turn):
+                        response = st.session_state.enhanced_agent.chat(prompt)
                     st.markdown("💭 **Enhanced Agent Response:**")
                     
                 else:  # Demo Mode
@@ -149,6 +192,8 @@ with col1:
         
         # Add AI response to session
         st.session_state.messages.append({"role": "assistant", "content": response})
+        if profile_turn and agent_mode != "Demo Mode":
+            st.session_state.profile_turn_done = True
 
 with col2:
     st.markdown("## 📈 Quick Tools")
@@ -162,18 +207,14 @@ with col2:
     interest_rate = st.number_input("Interest Rate (%)", value=6.5, step=0.1)
     
     if st.button("💰 Calculate Payment"):
-        loan_amount = price - (price * down_payment / 100)
-        monthly_rate = interest_rate / 100 / 12
-        num_payments = 30 * 12
+        mortgage = calculate_mortgage(price, down_payment, interest_rate, 30)
         
-        if monthly_rate == 0:
-            monthly_payment = loan_amount / num_payments
+        if "error" in mortgage:
+            st.error(mortgage["error"])
         else:
-            monthly_payment = loan_amount * (monthly_rate * (monthly_rate + 1)**num_payments) / ((monthly_rate + 1)**num_payments - 1)
-        
-        st.success(f"**Monthly Payment: ${monthly_payment:,.2f}**")
-        st.info(f"Loan Amount: ${loan_amount:,.2f}")
-        st.info(f"Total Interest: ${(monthly_payment * num_payments) - loan_amount:,.2f}")
+            st.success(f"**Monthly Payment: ${mortgage['monthly_payment']:,.2f}**")
+            st.info(f"Loan Amount: ${mortgage['loan_amount']:,.2f}")
+            st.info(f"Total Interest: ${mortgage['total_interest']:,.2f}")
     
     st.markdown('</div>', unsafe_allow_html=True)
     
@@ -191,8 +232,8 @@ with col2:
     
     for question in sample_questions:
         if st.button(f"🔸 {question}", key=question):
-            # Add question to chat
-            st.session_state.messages.append({"role": "user", "content": question})
+            # Answered by the chat column on the next run
+            st.session_state.pending_prompt = question
             st.rerun()
 
 # Footer
@@ -202,4 +243,14 @@ st.markdown("""
     <p>🚀 Built with Advanced RAG, Multi-Agent AI, and Real Estate Domain Expertise</p>
     <p>Powered by DeepSeek API • Vector Database • LangChain • Streamlit</p>
 </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
+
+# Per-rerun render time (includes any agent call made during this run)
+render_ms = (time.perf_counter() - render_start) * 1000
+st.session_state.render_times = (st.session_state.render_times + [render_ms])[-50:]
+recent = sorted(st.session_state.render_times)
+render_stats.markdown(
+    f"**Last Rerun**: {render_ms:,.0f} ms  \n"
+    f"**Median Rerun**: {recent[len(recent) // 2]:,.0f} ms ({len(recent)} runs)"
+)
+record_event("page_render", render_ms=round(render_ms, 1), agent_mode=agent_mode)
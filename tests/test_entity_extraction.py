@@ -0,0 +1,90 @@
+import json
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from entity_extraction import entity_values, extract_financial_entities, is_confident
+
+with open(os.path.join(ROOT, "benchmarks", "data", "financial_messages.jsonl")) as f:
+    CORPUS = [json.loads(line) for line in f if line.strip()]
+
+
+@pytest.mark.parametrize("case", CORPUS, ids=[c["message"][:40] for c in CORPUS])
+def test_corpus(case):
+    values = entity_values(extract_financial_entities(case["message"]))
+    assert set(values) == set(case["expected"])
+    for field, expected in case["expected"].items():
+        assert values[field] == pytest.approx(expected, abs=0.01), field
+
+
+def test_bare_five_digit_income_is_not_a_zip():
+    values = entity_values(extract_financial_entities("I earn 85000 and want a $400k house"))
+    assert values["income"] == 85000
+    assert values["price"] == 400000
+
+
+def test_labelled_bare_numbers():
+    values = entity_values(extract_financial_entities("income: 90000, price: 400000"))
+    assert values == {"income": 90000, "price": 400000}
+
+
+def test_zip_code_is_skipped():
+    values = entity_values(extract_financial_entities("Homes in 78704 under $600k, I make $150k"))
+    assert values == {"price": 600000, "income": 150000}
+
+
+def test_unlabelled_percent_is_not_a_rate():
+    text = "prices rose 8% last year. Can I afford a $500k home with $100k income?"
+    entities = extract_financial_entities(text)
+    assert "interest_rate" not in entities
+    assert is_confident(entities, text)
+
+
+def test_confident_without_income_when_not_mentioned():
+    text = "What would the monthly payment be on a $450,000 home with 20% down?"
+    assert is_confident(extract_financial_entities(text), text)
+
+
+def test_not_confident_when_mentioned_field_is_missing():
+    text = "Can I afford a $450,000 home? My income is decent"
+    assert not is_confident(extract_financial_entities(text), text)
+
+
+def test_not_confident_without_price():
+    text = "I make $120k a year"
+    assert not is_confident(extract_financial_entities(text), text)
+
+
+def test_monthly_budget_is_not_a_price():
+    text = "Budget is $3,000 a month, I earn $120k"
+    entities = extract_financial_entities(text)
+    assert "price" not in entities
+    assert not is_confident(entities, text)
+
+
+def test_dollar_down_payment_becomes_percent():
+    text = "What's the mortgage on a $350k house with $50k down?"
+    entities = extract_financial_entities(text)
+    assert entity_values(entities)["down_payment_percent"] == pytest.approx(14.29, abs=0.01)
+    assert is_confident(entities, text)
+
+
+def test_down_payment_is_not_inferred_income():
+    values = entity_values(extract_financial_entities("I can put $100k down on a $500k house"))
+    assert values == {"price": 500000, "down_payment_percent": 20}
+
+
+def test_debt_balance_is_not_monthly_debt():
+    text = "I owe $15,000 on student loans and make $70k, can I afford a $300k condo?"
+    entities = extract_financial_entities(text)
+    assert "monthly_debt" not in entities
+    assert not is_confident(entities, text)
+
+
+def test_monthly_debt_payment():
+    values = entity_values(extract_financial_entities("I have $1,200 in monthly debts and earn $7,000 per month"))
+    assert values == {"monthly_debt": 1200, "income": 84000}
@@ -0,0 +1,41 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from mmap_store import MmapStoreWriter, MmapVectorStore
+
+
+def _build(path, ids):
+    writer = MmapStoreWriter(path, dim=len(ids) + 1)
+    writer.add(ids, [i.upper() for i in ids], np.eye(len(ids), len(ids) + 1))
+    return writer.close()
+
+
+def test_round_trip(tmp_path):
+    store = _build(str(tmp_path / "index"), ["a", "b", "c"])
+    assert len(store) == 3
+    assert store.query(np.eye(3, 4)[:1], n_results=1)["documents"] == [["A"]]
+
+
+def test_interrupted_rebuild_leaves_no_meta(tmp_path, monkeypatch):
+    path = str(tmp_path / "index")
+    _build(path, ["a", "b", "c"])
+
+    # Die after the ids are replaced but before the vectors are
+    real_replace = os.replace
+    def crash_on_vectors(src, dst):
+        if dst.endswith(".vectors.npy"):
+            raise OSError("killed")
+        real_replace(src, dst)
+    monkeypatch.setattr(os, "replace", crash_on_vectors)
+    with pytest.raises(OSError):
+        _build(path, ["x", "y"])
+
+    assert not os.path.exists(f"{path}.meta.json")
+    with pytest.raises((FileNotFoundError, ValueError)):
+        MmapVectorStore(path)
@@ -0,0 +1,32 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from portfolio_simulator import simulate_portfolio
+
+PROPERTY = {"price": 300000, "monthly_rent": 2200}
+
+
+@pytest.mark.parametrize("years", [1, 10])
+def test_single_property_matches_portfolio_year1(years):
+    """With one property, its year-1 figures are the portfolio's (the sale is not operating cash)"""
+    result = simulate_portfolio([PROPERTY], n_paths=2000, years=years)
+    prop = result["properties"][0]
+    assert prop["cash_on_cash_year1"] == result["cash_on_cash_year1"]
+    assert prop["cap_rate_year1"] == result["cap_rate_year1"]
+    assert result["cash_on_cash_year1"]["p50"] < 0.2
+
+
+@pytest.mark.parametrize("kwargs", [{"years": 0}, {"n_paths": 0}])
+def test_rejects_empty_horizon(kwargs):
+    with pytest.raises(ValueError):
+        simulate_portfolio([PROPERTY], **kwargs)
+
+
+def test_rejects_no_properties():
+    with pytest.raises(ValueError):
+        simulate_portfolio([])
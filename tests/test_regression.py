@@ -0,0 +1,31 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.regression import compare
+
+
+def _results(**metrics):
+    return {"metrics": {name: {"value": value, "unit": "ratio", "higher_is_better": higher}
+                        for name, (value, higher) in metrics.items()}}
+
+
+def test_relative_regression():
+    regressions = compare(_results(latency=(1.3, False)), _results(latency=(1.0, False)), tolerance=0.15)
+    assert [r["metric"] for r in regressions] == ["latency"]
+
+
+def test_zero_baseline_is_gated():
+    baseline = _results(stale_hits=(0.0, False), precision_gain=(0.0, True))
+    current = _results(stale_hits=(0.8, False), precision_gain=(-0.2, True))
+    regressions = compare(current, baseline)
+    assert sorted(r["metric"] for r in regressions) == ["precision_gain", "stale_hits"]
+    assert all(r["change_percent"] is None for r in regressions)
+
+
+def test_zero_baseline_within_tolerance():
+    baseline = _results(stale_hits=(0.0, False), precision_gain=(0.0, True))
+    current = _results(stale_hits=(0.005, False), precision_gain=(0.3, True))
+    assert compare(current, baseline) == []